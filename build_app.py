@@ -5,13 +5,24 @@ Reads the Excel spreadsheet and generates a self-contained HTML file.
 """
 
 import openpyxl
+from openpyxl.utils import range_boundaries
+import functools
+import hashlib
 import json
 import os
+import pickle
+import posixpath
+import re
+import shutil
+import zipfile
+from xml.etree.ElementTree import fromstring, iterparse
 
 EXCEL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
                           'TIG_2E_Unofficial_Index_Companion_v2.xlsx')
 OUTPUT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
                            'isofarian_companion.html')
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          '.build_cache.pkl')
 
 
 def cell_str(val):
@@ -21,57 +32,96 @@ def cell_str(val):
     return str(val).strip()
 
 
-def parse_enemies(wb):
+XLSX_MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+XLSX_REL_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+XLSX_RELS_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+def sheet_xml_path(zf, title):
+    """Return the zip member holding the worksheet named title."""
+    sheets = fromstring(zf.read('xl/workbook.xml')).iter(XLSX_MAIN_NS + 'sheet')
+    rel_id = next(sh.get(XLSX_REL_ID) for sh in sheets if sh.get('name') == title)
+    rels = fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    target = next(rel.get('Target') for rel in rels.iter(XLSX_RELS_NS + 'Relationship')
+                  if rel.get('Id') == rel_id)
+    return target.lstrip('/') if target.startswith('/') else posixpath.join('xl', target)
+
+
+def merged_followers(ws):
+    """Return (row, col) of every merged cell except each range's top-left.
+
+    A normal load blanks these cells, but read-only worksheets hand back
+    whatever stale value Excel left behind in them. Read-only mode also
+    doesn't parse the merge ranges, so they are read straight from the
+    sheet's XML inside the .xlsx zip.
+    """
+    cells = set()
+    with zipfile.ZipFile(EXCEL_FILE) as zf, zf.open(sheet_xml_path(zf, ws.title)) as src:
+        for _, el in iterparse(src):
+            if el.tag.endswith('}mergeCell'):
+                min_col, min_row, max_col, max_row = range_boundaries(el.get('ref'))
+                for r in range(min_row, max_row + 1):
+                    for c in range(min_col, max_col + 1):
+                        if (r, c) != (min_row, min_col):
+                            cells.add((r, c))
+            el.clear()
+    return cells
+
+
+# Common Bestiary column mapping from row 5 (0-based indices below):
+# B=Name, C=Rating, D=Att, E=Def, F=AP, G=HP
+# H=Ch1, I=Ch2, J=Ch3, K=Ch4
+# L=Lux, M=Sil, N=Item, O=Speaking Stone
+# P=Metal Frag (★), Q=Bone Frag, R=Feathers, S=Wolf Pelt
+# T=Rough Leather (★★), U=Animal Hide, V=Claw
+# W=Bear Pelt (★★★), X=Horn, Y=Spines
+# Z=Scales (★★★★), AA=Carapace
+# AB=Tenebris Shards (★), AC=Tenebris Skull (★★), AD=Tenebris Essence (★★★)
+ENEMY_DROP_COLS = [
+    ('Metal Fragments', 15),   # P
+    ('Bone Fragments', 16),
+    ('Feathers', 17),
+    ('Wolf Pelt', 18),
+    ('Rough Leather', 19),
+    ('Animal Hide', 20),
+    ('Claw', 21),
+    ('Bear Pelt', 22),
+    ('Horn', 23),
+    ('Spines', 24),
+    ('Scales', 25),
+    ('Carapace', 26),
+    ('Tenebris Shards', 27),
+    ('Tenebris Skull', 28),
+    ('Tenebris Essence', 29),
+]
+ENEMY_CHAPTER_COLS = [('Chapter 1', 7), ('Chapter 2', 8), ('Chapter 3', 9), ('Chapter 4', 10)]
+ENEMY_WIDTH = 30
+
+
+def parse_enemies(ws):
     """Parse Common Bestiary sheet."""
-    ws = wb['Common Bestiary']
     enemies = []
     current_name = None
-
-    # Column mapping from row 5:
-    # B=Name, C=Rating, D=Att, E=Def, F=AP, G=HP
-    # H=Ch1, I=Ch2, J=Ch3, K=Ch4
-    # L=Lux, M=Sil, N=Item, O=Speaking Stone
-    # P=Metal Frag (★), Q=Bone Frag, R=Feathers, S=Wolf Pelt
-    # T=Rough Leather (★★), U=Animal Hide, V=Claw
-    # W=Bear Pelt (★★★), X=Horn, Y=Spines
-    # Z=Scales (★★★★), AA=Carapace
-    # AB=Tenebris Shards (★), AC=Tenebris Skull (★★), AD=Tenebris Essence (★★★)
-
-    drop_cols = {
-        'Metal Fragments': 15,   # P (col index 15, 0-based)
-        'Bone Fragments': 16,
-        'Feathers': 17,
-        'Wolf Pelt': 18,
-        'Rough Leather': 19,
-        'Animal Hide': 20,
-        'Claw': 21,
-        'Bear Pelt': 22,
-        'Horn': 23,
-        'Spines': 24,
-        'Scales': 25,
-        'Carapace': 26,
-        'Tenebris Shards': 27,
-        'Tenebris Skull': 28,
-        'Tenebris Essence': 29,
-    }
-
-    for row in ws.iter_rows(min_row=6, max_row=ws.max_row, values_only=True):
-        vals = [cell_str(c) for c in row]
-        # Skip empty rows
-        if not any(vals):
-            continue
-
-        name = vals[1]
-        if name:
-            current_name = name
-
-        rating = vals[2]
+    merged = merged_followers(ws)
+
+    rows = ws.iter_rows(min_row=6, max_col=ENEMY_WIDTH, values_only=True)
+    for row_idx, row in enumerate(rows, start=6):
+        # Names are merged down over each enemy's rating rows, so a blank
+        # name continues the previous enemy
+        if (row_idx, 2) not in merged:
+            name = cell_str(row[1])
+            if name:
+                current_name = name
+
+        rating = cell_str(row[2])
         if not rating:
             continue
 
+        vals = [cell_str(c) for c in row]
+
         drops = []
-        for mat_name, col_idx in drop_cols.items():
-            v = vals[col_idx] if col_idx < len(vals) else ''
+        for mat_name, col_idx in ENEMY_DROP_COLS:
+            v = vals[col_idx]
             if v and v.upper() == 'X':
                 drops.append(mat_name)
             elif v and v not in ('', 'X'):
@@ -79,10 +129,9 @@ def parse_enemies(wb):
                 drops.append(f"{mat_name} ({v})")
 
         locations = {}
-        for ch, idx in [('Chapter 1', 7), ('Chapter 2', 8), ('Chapter 3', 9), ('Chapter 4', 10)]:
-            loc = vals[idx] if idx < len(vals) else ''
-            if loc:
-                locations[ch] = loc
+        for ch, idx in ENEMY_CHAPTER_COLS:
+            if vals[idx]:
+                locations[ch] = vals[idx]
 
         entry = {
             'name': current_name,
@@ -98,234 +147,172 @@ def parse_enemies(wb):
             'speakingStoneDrop': vals[14],
             'materialDrops': drops,
         }
+        # Blank cells are left out; the app reads a missing key as empty
+        entry = {k: v for k, v in entry.items() if v != ''}
         enemies.append(entry)
 
     return enemies
 
 
-def parse_armor_weapons(wb):
-    """Parse Armor-Weapon Guide sheet."""
-    ws = wb['Armor-Weapon Guide']
-    items = []
+# Crafting cost columns: (bucket, resource, Qty col, 2R col), 0-based.
+ARMOR_WEAPON_COST_COLS = [
+    ('materials', 'Metal Fragments', 22, 23),
+    ('materials', 'Bone Fragments', 24, 25),
+    ('materials', 'Feathers', 26, 27),
+    ('materials', 'Wolf Pelt', 28, 29),
+    ('materials', 'Rough Leather', 30, 31),
+    ('materials', 'Animal Hide', 32, 33),
+    ('materials', 'Claw', 34, 35),
+    ('materials', 'Bear Pelt', 36, 37),
+    ('materials', 'Horn', 38, 39),
+    ('materials', 'Spines', 40, 41),
+    ('materials', 'Scales', 42, 43),
+    ('materials', 'Carapace', 44, 45),
+    ('materials', 'Tenebris Shards', 46, 47),
+    ('materials', 'Tenebris Skull', 48, 49),
+    ('materials', 'Tenebris Essence', 50, 51),
+    ('wood', 'Pine', 53, 54),
+    ('wood', 'Rosewood', 55, 56),
+    ('wood', 'Ash', 57, 58),
+    ('wood', 'Autumn Blaze', 59, 60),
+    ('wood', 'Dogwood', 61, 62),
+    ('wood', 'Cedar', 63, 64),
+    ('wood', 'Cherry', 65, 66),
+    ('wood', 'Ancient Oak', 67, 68),
+    ('ores', 'Iron', 70, 71),
+    ('ores', 'Silver', 72, 73),
+    ('ores', 'Gold', 74, 75),
+    ('ores', 'Agate', 76, 77),
+    ('ores', 'Crystal', 78, 79),
+    ('ores', 'Diamond', 80, 81),
+]
+
+ACCESSORY_COST_COLS = [
+    ('materials', 'Metal Fragments', 18, 19),
+    ('materials', 'Bone Fragments', 20, 21),
+    ('materials', 'Feathers', 22, 23),
+    ('materials', 'Wolf Pelt', 24, 25),
+    ('materials', 'Rough Leather', 26, 27),
+    ('materials', 'Animal Hide', 28, 29),
+    ('materials', 'Claw', 30, 31),
+    ('materials', 'Bear Pelt', 32, 33),
+    ('materials', 'Horn', 34, 35),
+    ('materials', 'Spines', 36, 37),
+    ('materials', 'Scales', 38, 39),
+    ('materials', 'Carapace', 40, 41),
+    ('materials', 'Tenebris Shards', 42, 43),
+    ('materials', 'Tenebris Skull', 44, 45),
+    ('materials', 'Tenebris Essence', 46, 47),
+    ('wood', 'Pine', 49, 50),
+    ('wood', 'Rosewood', 51, 52),
+    ('wood', 'Ash', 53, 54),
+    ('wood', 'Autumn Blaze', 55, 56),
+    ('wood', 'Dogwood', 57, 58),
+    ('wood', 'Cedar', 59, 60),
+    ('wood', 'Cherry', 61, 62),
+    ('wood', 'Ancient Oak', 63, 64),
+    ('ores', 'Iron', 66, 67),
+    ('ores', 'Silver', 68, 69),
+    ('ores', 'Gold', 70, 71),
+    ('ores', 'Agate', 72, 73),
+    ('ores', 'Crystal', 74, 75),
+    ('ores', 'Diamond', 76, 77),
+]
+
+# Crafting guide sheet layouts for parse_craft_sheet(). 'fields' maps
+# entry keys to columns (in output order); rows are read exactly 'width'
+# columns wide so column lookups need no bounds checks.
+ARMOR_WEAPON_SCHEMA = {
+    'fields': [
+        ('city', 2), ('limitedTo', 3), ('rating', 4), ('type', 5),
+        ('statIncrease', 6), ('stoneSlots', 7), ('bonusChip', 8),
+        ('craftCost', 10), ('sellPrice', 11), ('luxCost', 13),
+        ('prerequisite', 15), ('itemRequired', 17),
+        ('speakingStone', 19), ('speakingStoneRep', 20),
+    ],
+    'costs': ARMOR_WEAPON_COST_COLS,
+    'width': 82,
+}
 
-    # Material columns mapping (paired: Qty, 2R)
-    mat_cols = [
-        ('Metal Fragments', 22, 23),
-        ('Bone Fragments', 24, 25),
-        ('Feathers', 26, 27),
-        ('Wolf Pelt', 28, 29),
-        ('Rough Leather', 30, 31),
-        ('Animal Hide', 32, 33),
-        ('Claw', 34, 35),
-        ('Bear Pelt', 36, 37),
-        ('Horn', 38, 39),
-        ('Spines', 40, 41),
-        ('Scales', 42, 43),
-        ('Carapace', 44, 45),
-        ('Tenebris Shards', 46, 47),
-        ('Tenebris Skull', 48, 49),
-        ('Tenebris Essence', 50, 51),
-    ]
+ACCESSORY_SCHEMA = {
+    'fields': [
+        ('city', 2), ('type', 3), ('usableInField', 4), ('effect', 5),
+        ('craftCost', 7), ('sellPrice', 8), ('luxCost', 10),
+        ('prerequisite', 12), ('itemRequired', 14),
+        ('speakingStone', 16), ('speakingStoneRep', 17),
+    ],
+    'costs': ACCESSORY_COST_COLS,
+    'width': 78,
+}
 
-    wood_cols = [
-        ('Pine', 53, 54),
-        ('Rosewood', 55, 56),
-        ('Ash', 57, 58),
-        ('Autumn Blaze', 59, 60),
-        ('Dogwood', 61, 62),
-        ('Cedar', 63, 64),
-        ('Cherry', 65, 66),
-        ('Ancient Oak', 67, 68),
-    ]
 
-    ore_cols = [
-        ('Iron', 70, 71),
-        ('Silver', 72, 73),
-        ('Gold', 74, 75),
-        ('Agate', 76, 77),
-        ('Crystal', 78, 79),
-        ('Diamond', 80, 81),
-    ]
+def parse_craft_sheet(ws, schema):
+    """Parse a crafting guide sheet laid out as described by schema."""
+    items = []
+    fields = schema['fields']
+    costs = schema['costs']
+    width = schema['width']
 
-    for row in ws.iter_rows(min_row=7, max_row=ws.max_row, values_only=True):
-        vals = [cell_str(c) for c in row]
-        name = vals[1]
+    for row in ws.iter_rows(min_row=7, max_col=width, values_only=True):
+        name = cell_str(row[1])
         if not name:
             continue
+        vals = [cell_str(c) for c in row]
 
-        materials = {}
-        for mat_name, qty_col, rep_col in mat_cols:
-            qty = vals[qty_col] if qty_col < len(vals) else ''
-            rep = vals[rep_col] if rep_col < len(vals) else ''
-            if qty:
-                materials[mat_name] = {'qty': qty, 'rep2': rep}
-
-        wood = {}
-        for w_name, qty_col, rep_col in wood_cols:
-            qty = vals[qty_col] if qty_col < len(vals) else ''
-            rep = vals[rep_col] if rep_col < len(vals) else ''
-            if qty:
-                wood[w_name] = {'qty': qty, 'rep2': rep}
-
-        ores = {}
-        for o_name, qty_col, rep_col in ore_cols:
-            qty = vals[qty_col] if qty_col < len(vals) else ''
-            rep = vals[rep_col] if rep_col < len(vals) else ''
+        entry = {'name': name}
+        for key, col in fields:
+            if vals[col]:
+                entry[key] = vals[col]
+        entry['materials'] = {}
+        entry['wood'] = {}
+        entry['ores'] = {}
+        for bucket, r_name, qty_col, rep_col in costs:
+            qty = vals[qty_col]
             if qty:
-                ores[o_name] = {'qty': qty, 'rep2': rep}
-
-        speaking_stone = vals[19] if 19 < len(vals) else ''
-        speaking_stone_rep = vals[20] if 20 < len(vals) else ''
-
-        entry = {
-            'name': name,
-            'city': vals[2],
-            'limitedTo': vals[3],
-            'rating': vals[4],
-            'type': vals[5],
-            'statIncrease': vals[6],
-            'stoneSlots': vals[7],
-            'bonusChip': vals[8],
-            'craftCost': vals[10],
-            'sellPrice': vals[11],
-            'luxCost': vals[13],
-            'prerequisite': vals[15],
-            'itemRequired': vals[17],
-            'speakingStone': speaking_stone,
-            'speakingStoneRep': speaking_stone_rep,
-            'materials': materials,
-            'wood': wood,
-            'ores': ores,
-        }
+                cost = entry[bucket][r_name] = {'qty': qty}
+                if vals[rep_col]:
+                    cost['rep2'] = vals[rep_col]
         items.append(entry)
 
     return items
 
 
-def parse_accessories(wb):
-    """Parse Accessory-Item Guide sheet."""
-    ws = wb['Accessory-Item Guide']
-    items = []
-
-    mat_cols = [
-        ('Metal Fragments', 18, 19),
-        ('Bone Fragments', 20, 21),
-        ('Feathers', 22, 23),
-        ('Wolf Pelt', 24, 25),
-        ('Rough Leather', 26, 27),
-        ('Animal Hide', 28, 29),
-        ('Claw', 30, 31),
-        ('Bear Pelt', 32, 33),
-        ('Horn', 34, 35),
-        ('Spines', 36, 37),
-        ('Scales', 38, 39),
-        ('Carapace', 40, 41),
-        ('Tenebris Shards', 42, 43),
-        ('Tenebris Skull', 44, 45),
-        ('Tenebris Essence', 46, 47),
-    ]
-
-    wood_cols = [
-        ('Pine', 49, 50),
-        ('Rosewood', 51, 52),
-        ('Ash', 53, 54),
-        ('Autumn Blaze', 55, 56),
-        ('Dogwood', 57, 58),
-        ('Cedar', 59, 60),
-        ('Cherry', 61, 62),
-        ('Ancient Oak', 63, 64),
-    ]
-
-    ore_cols = [
-        ('Iron', 66, 67),
-        ('Silver', 68, 69),
-        ('Gold', 70, 71),
-        ('Agate', 72, 73),
-        ('Crystal', 74, 75),
-        ('Diamond', 76, 77),
-    ]
-
-    for row in ws.iter_rows(min_row=7, max_row=ws.max_row, values_only=True):
-        vals = [cell_str(c) for c in row]
-        name = vals[1]
-        if not name:
-            continue
-
-        materials = {}
-        for mat_name, qty_col, rep_col in mat_cols:
-            qty = vals[qty_col] if qty_col < len(vals) else ''
-            rep = vals[rep_col] if rep_col < len(vals) else ''
-            if qty:
-                materials[mat_name] = {'qty': qty, 'rep2': rep}
-
-        wood = {}
-        for w_name, qty_col, rep_col in wood_cols:
-            qty = vals[qty_col] if qty_col < len(vals) else ''
-            rep = vals[rep_col] if rep_col < len(vals) else ''
-            if qty:
-                wood[w_name] = {'qty': qty, 'rep2': rep}
-
-        ores = {}
-        for o_name, qty_col, rep_col in ore_cols:
-            qty = vals[qty_col] if qty_col < len(vals) else ''
-            rep = vals[rep_col] if rep_col < len(vals) else ''
-            if qty:
-                ores[o_name] = {'qty': qty, 'rep2': rep}
-
-        speaking_stone = vals[16] if 16 < len(vals) else ''
-        speaking_stone_rep = vals[17] if 17 < len(vals) else ''
+def parse_armor_weapons(ws):
+    """Parse Armor-Weapon Guide sheet."""
+    return parse_craft_sheet(ws, ARMOR_WEAPON_SCHEMA)
 
-        entry = {
-            'name': name,
-            'city': vals[2],
-            'type': vals[3],
-            'usableInField': vals[4],
-            'effect': vals[5],
-            'craftCost': vals[7],
-            'sellPrice': vals[8],
-            'luxCost': vals[10],
-            'prerequisite': vals[12],
-            'itemRequired': vals[14],
-            'speakingStone': speaking_stone,
-            'speakingStoneRep': speaking_stone_rep,
-            'materials': materials,
-            'wood': wood,
-            'ores': ores,
-        }
-        items.append(entry)
 
-    return items
+def parse_accessories(ws):
+    """Parse Accessory-Item Guide sheet."""
+    return parse_craft_sheet(ws, ACCESSORY_SCHEMA)
 
 
-def parse_market(wb):
+def parse_market(ws):
     """Parse Market Guide sheet."""
-    ws = wb['Market Guide']
     items = []
 
     towns = ['Mir', 'Razdor', 'Ryba', 'Silny', 'Strofa', 'Vouno']
     # Each town has 3 cols: Buy, Buy 2Rep, Sell
     # Starting at col D (index 3)
     # Fort Istra Apothecary has only 1 col: Sell (Lux) at col V (index 21)
+    width = 3 + 3 * len(towns) + 1
 
-    for row in ws.iter_rows(min_row=6, max_row=ws.max_row, values_only=True):
-        vals = [cell_str(c) for c in row]
-        name = vals[1]
+    for row in ws.iter_rows(min_row=6, max_col=width, values_only=True):
+        name = cell_str(row[1])
         if not name:
             continue
+        vals = [cell_str(c) for c in row]
 
         effect = vals[2]
         prices = {}
-        col = 3
-        for town in towns:
-            buy = vals[col] if col < len(vals) else ''
-            buy2r = vals[col + 1] if col + 1 < len(vals) else ''
-            sell = vals[col + 2] if col + 2 < len(vals) else ''
+        # Walk the town blocks as (buy, buy2r, sell) triples
+        triples = zip(*[iter(vals[3:width - 1])] * 3)
+        for town, (buy, buy2r, sell) in zip(towns, triples):
             if buy or buy2r or sell:
                 prices[town] = {'buy': buy, 'buy2Rep': buy2r, 'sell': sell}
-            col += 3
 
         # Fort Istra Apothecary: single sell column (Lux)
-        ft_sell = vals[col] if col < len(vals) else ''
+        ft_sell = vals[width - 1]
         if ft_sell:
             prices['Fort Istra Apothecary'] = {'buy': '', 'buy2Rep': '', 'sell': ft_sell}
 
@@ -339,9 +326,8 @@ def parse_market(wb):
     return items
 
 
-def parse_buildings(wb):
+def parse_buildings(ws):
     """Parse Ft. Istra Buildings sheet."""
-    ws = wb['Ft. Istra Buildings']
     buildings = []
 
     wood_cols = [('Pine', 4), ('Rosewood', 5), ('Ash', 6), ('Autumn Blaze', 7),
@@ -349,8 +335,26 @@ def parse_buildings(wb):
     ore_cols = [('Iron', 13), ('Silver', 14), ('Gold', 15),
                 ('Agate', 16), ('Crystal', 17), ('Diamond', 18)]
 
-    for row in ws.iter_rows(min_row=6, max_row=20, values_only=True):
+    harvest = {}
+    lux_costs = {}
+
+    # Rows 6-20 are buildings, row 21 holds harvesting locations and
+    # row 23 the Lux costs. Read them in one pass: in read-only mode every
+    # iter_rows() call re-streams the sheet XML from the top.
+    rows = ws.iter_rows(min_row=6, max_row=23, max_col=19, values_only=True)
+    for row_idx, row in enumerate(rows, start=6):
         vals = [cell_str(c) for c in row]
+
+        if row_idx in (21, 23):
+            target = harvest if row_idx == 21 else lux_costs
+            for r_name, idx in wood_cols + ore_cols:
+                v = vals[idx]
+                if v:
+                    target[r_name] = v
+            continue
+        if row_idx > 20:
+            continue
+
         name = vals[1]
         if not name:
             continue
@@ -358,13 +362,13 @@ def parse_buildings(wb):
         item_req = vals[2]
         wood = {}
         for w_name, idx in wood_cols:
-            v = vals[idx] if idx < len(vals) else ''
+            v = vals[idx]
             if v:
                 wood[w_name] = v
 
         ores = {}
         for o_name, idx in ore_cols:
-            v = vals[idx] if idx < len(vals) else ''
+            v = vals[idx]
             if v:
                 ores[o_name] = v
 
@@ -375,45 +379,18 @@ def parse_buildings(wb):
             'ores': ores,
         })
 
-    # Parse harvesting locations (row 21)
-    harvest = {}
-    for row in ws.iter_rows(min_row=21, max_row=21, values_only=True):
-        vals = [cell_str(c) for c in row]
-        for w_name, idx in wood_cols:
-            v = vals[idx] if idx < len(vals) else ''
-            if v:
-                harvest[w_name] = v
-        for o_name, idx in ore_cols:
-            v = vals[idx] if idx < len(vals) else ''
-            if v:
-                harvest[o_name] = v
-
-    # Parse Lux costs (row 23)
-    lux_costs = {}
-    for row in ws.iter_rows(min_row=23, max_row=23, values_only=True):
-        vals = [cell_str(c) for c in row]
-        for w_name, idx in wood_cols:
-            v = vals[idx] if idx < len(vals) else ''
-            if v:
-                lux_costs[w_name] = v
-        for o_name, idx in ore_cols:
-            v = vals[idx] if idx < len(vals) else ''
-            if v:
-                lux_costs[o_name] = v
-
     return buildings, harvest, lux_costs
 
 
-def parse_speaking_stones(wb):
+def parse_speaking_stones(ws):
     """Parse Speaking Stone Bonuses sheet."""
-    ws = wb['Speaking Stone Bonuses']
     stones = []
 
-    for row in ws.iter_rows(min_row=6, max_row=ws.max_row, values_only=True):
-        vals = [cell_str(c) for c in row]
-        name = vals[1]
+    for row in ws.iter_rows(min_row=6, max_col=7, values_only=True):
+        name = cell_str(row[1])
         if not name:
             continue
+        vals = [cell_str(c) for c in row]
 
         stones.append({
             'name': name,
@@ -427,21 +404,21 @@ def parse_speaking_stones(wb):
     return stones
 
 
-def parse_prereqs(wb):
+def parse_prereqs(ws):
     """Parse Blacksmith Pre-req Guide for upgrade chains."""
-    ws = wb['Blacksmith Pre-req Guide']
     chains = []
     current_chain = []
 
-    for row in ws.iter_rows(min_row=5, max_row=ws.max_row, values_only=True):
-        vals = [cell_str(c) for c in row]
-        name = vals[1]
+    # Columns B-I; the rest of the sheet is layout
+    for row in ws.iter_rows(min_row=5, max_col=9, values_only=True):
+        name = cell_str(row[1])
 
         if not name:
             if current_chain:
                 chains.append(current_chain)
                 current_chain = []
             continue
+        vals = [cell_str(c) for c in row]
 
         current_chain.append({
             'name': name,
@@ -460,6 +437,58 @@ def parse_prereqs(wb):
     return chains
 
 
+def parse_workbook():
+    """Parse every sheet the app uses into the DATA dict (minus the map graph)."""
+    print("Reading Excel file...")
+    # read_only streams rows from the sheet XML instead of building the
+    # full cell tree up front; keep_links=False skips external link parts,
+    # which only matter when writing the workbook back out.
+    wb = openpyxl.load_workbook(EXCEL_FILE, read_only=True, data_only=True,
+                                keep_links=False)
+
+    print("Parsing enemies...")
+    enemies = parse_enemies(wb['Common Bestiary'])
+    print(f"  Found {len(enemies)} enemy entries")
+
+    print("Parsing armor & weapons...")
+    armor_weapons = parse_armor_weapons(wb['Armor-Weapon Guide'])
+    print(f"  Found {len(armor_weapons)} armor/weapon entries")
+
+    print("Parsing accessories & items...")
+    accessories = parse_accessories(wb['Accessory-Item Guide'])
+    print(f"  Found {len(accessories)} accessory/item entries")
+
+    print("Parsing market...")
+    market = parse_market(wb['Market Guide'])
+    print(f"  Found {len(market)} market entries")
+
+    print("Parsing buildings...")
+    buildings, harvest_locations, lux_costs = parse_buildings(wb['Ft. Istra Buildings'])
+    print(f"  Found {len(buildings)} building entries")
+
+    print("Parsing speaking stones...")
+    stones = parse_speaking_stones(wb['Speaking Stone Bonuses'])
+    print(f"  Found {len(stones)} speaking stones")
+
+    print("Parsing prerequisite chains...")
+    prereqs = parse_prereqs(wb['Blacksmith Pre-req Guide'])
+    print(f"  Found {len(prereqs)} prerequisite chains")
+
+    wb.close()
+
+    return {
+        'enemies': enemies,
+        'armorWeapons': armor_weapons,
+        'accessories': accessories,
+        'market': market,
+        'buildings': buildings,
+        'harvestLocations': harvest_locations,
+        'resourceLuxCosts': lux_costs,
+        'speakingStones': stones,
+        'prereqChains': prereqs,
+    }
+
+
 # ---------------------------------------------------------------------------
 # Map graph data: node positions (px on 3000x4511 map) + edges
 # Positions are best-effort traces from map-of-isofar.png.
@@ -826,46 +855,39 @@ SPECIAL_AREA_NAME_TO_ID = {
     "IC - Receiving Room": "ic_receiving_room",
 }
 
+# One comma-separated entry of a location string: a node number or a
+# special area name ("FW - ..." / "IC - ..."), minus trailing dots.
+# Entries matching neither (notes, typos) are skipped.
+LOCATION_TOKEN_RE = re.compile(r'(?:^|,)\s*(?:(\d+)|((?:FW|IC)[^,]*?))[\s.]*(?=,|$)')
+
+
+@functools.lru_cache(maxsize=None)
+def parse_location_string(loc_str):
+    """Parse a location string like '1, 5, FW - Ice Fields' into node IDs.
+
+    Memoized, since an enemy's rating rows often repeat the same locations.
+    Returns a tuple so cached results can't be mutated by callers.
+    """
+    node_ids = []
+    for num, area in LOCATION_TOKEN_RE.findall(loc_str):
+        if num:
+            node_ids.append(str(int(num)))
+        else:
+            # Collapse stray double spaces / non-breaking spaces before
+            # the lookup so "FW  - Ice Fields" still resolves
+            nid = SPECIAL_AREA_NAME_TO_ID.get(' '.join(area.split()))
+            if nid:
+                node_ids.append(nid)
+    return tuple(node_ids)
+
 
 def enrich_map_graph(data):
     """Add chapter, enemy, and resource metadata to map graph nodes."""
-    import copy, re
-    graph = copy.deepcopy(MAP_GRAPH)
-    nodes = graph["nodes"]
-
-    # Initialize metadata on each node
-    for nid, node in nodes.items():
-        node.setdefault("chapters", [])
-        node.setdefault("enemies", [])
-        node.setdefault("resources", [])
-
-    def parse_location_string(loc_str):
-        """Parse a location string like '1, 5, FW - Ice Fields' into node IDs."""
-        node_ids = []
-        parts = [p.strip().rstrip('.') for p in loc_str.split(',')]
-        i = 0
-        while i < len(parts):
-            p = parts[i].strip()
-            if not p:
-                i += 1
-                continue
-            # Check for multi-word special area names
-            # Special areas start with "FW" or "IC"
-            if p.startswith('FW') or p.startswith('IC'):
-                # Reconstruct the full name (may have been split by commas in the name)
-                # Actually the names don't have commas, but they're comma-separated in the list
-                full_name = p
-                nid = SPECIAL_AREA_NAME_TO_ID.get(full_name)
-                if nid:
-                    node_ids.append(nid)
-            else:
-                try:
-                    num = int(p)
-                    node_ids.append(str(num))
-                except ValueError:
-                    pass
-            i += 1
-        return node_ids
+    # Collect metadata in per-node sets (dicts for enemies/resources, to
+    # keep first-seen order) instead of scanning lists before every append.
+    chapters = {nid: set() for nid in MAP_GRAPH["nodes"]}
+    enemies = {nid: {} for nid in MAP_GRAPH["nodes"]}
+    resources = {nid: {} for nid in MAP_GRAPH["nodes"]}
 
     # Process enemies to add chapter and enemy info to nodes
     for enemy in data["enemies"]:
@@ -873,11 +895,9 @@ def enrich_map_graph(data):
             ch_num = chapter.replace("Chapter ", "")
             nids = parse_location_string(loc_str)
             for nid in nids:
-                if nid in nodes:
-                    if ch_num not in nodes[nid]["chapters"]:
-                        nodes[nid]["chapters"].append(ch_num)
-                    if enemy["name"] not in nodes[nid]["enemies"]:
-                        nodes[nid]["enemies"].append(enemy["name"])
+                if nid in chapters:
+                    chapters[nid].add(ch_num)
+                    enemies[nid][enemy["name"]] = None
 
     # Process harvest locations to add resource info
     for resource, loc_str in data["harvestLocations"].items():
@@ -885,28 +905,47 @@ def enrich_map_graph(data):
         for p in parts:
             try:
                 nid = str(int(p))
-                if nid in nodes:
-                    if resource not in nodes[nid]["resources"]:
-                        nodes[nid]["resources"].append(resource)
+                if nid in resources:
+                    resources[nid][resource] = None
             except ValueError:
                 pass
 
-    # Sort chapters on each node
-    for nid, node in nodes.items():
-        node["chapters"] = sorted(set(node["chapters"]))
+    # Node dicts hold only scalars, so a one-level copy keeps MAP_GRAPH
+    # untouched without a deepcopy walk. Edge pairs are never mutated and
+    # can be shared.
+    nodes = {
+        nid: dict(node, chapters=sorted(chapters[nid]), enemies=list(enemies[nid]),
+                  resources=list(resources[nid]))
+        for nid, node in MAP_GRAPH["nodes"].items()
+    }
+    graph = {"nodes": nodes, "edges": list(MAP_GRAPH["edges"])}
 
     return graph
 
 
+# Prevent </script> injection and HTML entity issues in the inline script.
+# Applied as chained str.replace calls: each is a memchr-speed scan that
+# returns the string untouched when the character is absent (the usual
+# case), which benchmarks faster than a single-pass re.sub/str.translate.
+SCRIPT_JSON_ESCAPES = (('<', '\\u003c'), ('>', '\\u003e'), ('&', '\\u0026'))
+
+
 def build_html(data):
-    """Generate the self-contained HTML file."""
-    data_json = json.dumps(data, ensure_ascii=False, indent=None)
-    # Prevent </script> injection and HTML entity issues in inline script
-    data_json = data_json.replace('<', '\\u003c')
-    data_json = data_json.replace('>', '\\u003e')
-    data_json = data_json.replace('&', '\\u0026')
-
-    html = r'''<!DOCTYPE html>
+    """Generate the self-contained HTML file as a sequence of text chunks.
+
+    The template is split around the embedded data so the caller can write
+    the pieces straight out instead of concatenating one giant string.
+    """
+    # Compact separators: the payload is embedded inline, so every byte of
+    # whitespace is serialized, escaped, shipped and parsed for nothing.
+    # data is a plain tree of dicts/lists/strs, so the encoder's
+    # per-container cycle bookkeeping can be skipped.
+    data_json = json.dumps(data, ensure_ascii=False, separators=(',', ':'),
+                           check_circular=False)
+    for char, escape in SCRIPT_JSON_ESCAPES:
+        data_json = data_json.replace(char, escape)
+
+    yield r'''<!DOCTYPE html>
 <html lang="en">
 <head>
 <meta charset="UTF-8">
@@ -970,6 +1009,8 @@ a:hover { text-decoration: underline; color: #90caf9; }
 
 /* Cards */
 .card-grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(340px, 1fr)); gap: 12px; }
+/* Let the browser skip layout and paint for cards scrolled out of view */
+.card-grid > .card { content-visibility: auto; contain-intrinsic-size: auto 220px; }
 .card { background: var(--bg2); border: 1px solid #333; border-radius: 8px; padding: 14px; transition: border-color 0.2s; }
 .card:hover { border-color: var(--accent); }
 .card-title { font-size: 1.1rem; font-weight: 700; color: var(--gold); margin-bottom: 6px; display: flex; align-items: center; gap: 8px; }
@@ -1003,6 +1044,9 @@ a:hover { text-decoration: underline; color: #90caf9; }
 
 .locations-list { font-size: 0.82rem; color: var(--text2); margin-top: 4px; }
 .locations-list span { color: var(--green); }
+.sub-note { font-size: 0.82rem; color: var(--text2); margin-top: 4px; }
+.loc-text { color: var(--green); }
+.struck { text-decoration: line-through; }
 
 /* Detail overlay */
 .overlay { display: none; position: fixed; top: 0; left: 0; right: 0; bottom: 0; background: rgba(0,0,0,0.7); z-index: 100; overflow-y: auto; padding: 40px 16px; }
@@ -1053,6 +1097,10 @@ a:hover { text-decoration: underline; color: #90caf9; }
 .rep-toggle button.active { background: var(--accent); color: #fff; font-weight: 600; }
 .rep-toggle button:hover:not(.active) { background: rgba(255,255,255,0.1); }
 .market-table td.price-active { font-weight: 600; background: rgba(255,255,255,0.04); }
+.market-table .mk-name { font-weight: 600; }
+.market-table td.mk-effect { font-size: 0.8rem; color: var(--text2); max-width: 200px; }
+.market-table td.mk-none { text-align: center; color: var(--text2); }
+.market-table td.mk-lux { color: var(--gold); }
 .market-table td.price-dim { opacity: 0.35; }
 
 /* Route Planner */
@@ -1101,6 +1149,14 @@ a:hover { text-decoration: underline; color: #90caf9; }
 .rp-tooltip .tt-name { font-weight: 700; color: var(--gold); }
 .rp-tooltip .tt-info { color: var(--text2); margin-top: 4px; }
 
+/* Editor dialogs */
+.rp-modal-panel { max-width: 460px; margin-top: 10vh; }
+.rp-modal-msg { white-space: pre-wrap; font-size: 0.88rem; }
+.rp-modal-panel input[type="text"] { width: 100%; margin-top: 12px; padding: 7px 10px; border-radius: 5px; border: 1px solid #444;
+  background: var(--bg); color: var(--text); font-size: 0.88rem; }
+.rp-modal-panel input[type="text"]:focus { border-color: var(--accent); outline: none; }
+.rp-modal-btns { display: flex; justify-content: flex-end; gap: 8px; }
+
 .rp-editor-bar { display: flex; gap: 6px; align-items: center; margin-top: 12px; padding-top: 10px; border-top: 1px solid #333; flex-wrap: wrap; }
 .rp-search-filter { margin-top: 6px; }
 .rp-item-search-wrap { position: relative; }
@@ -1348,16 +1404,45 @@ a:hover { text-decoration: underline; color: #90caf9; }
   </div>
 </div>
 
+<div class="overlay" id="rp-modal">
+  <div class="detail-panel rp-modal-panel">
+    <div class="rp-modal-msg" id="rp-modal-msg"></div>
+    <input type="text" id="rp-modal-input" autocomplete="off" />
+    <div class="rp-modal-btns">
+      <button class="rp-btn rp-btn-secondary" id="rp-modal-cancel">Cancel</button>
+      <button class="rp-btn rp-btn-primary" id="rp-modal-ok">OK</button>
+    </div>
+  </div>
+</div>
+
 <script>
-const DATA = ''' + data_json + r''';
+const DATA = '''
+    yield data_json
+    yield r''';
 
 // --- Utility ---
-function esc(s) { if (!s) return ''; return String(s).replace(/&/g,'&amp;').replace(/</g,'&lt;').replace(/>/g,'&gt;').replace(/"/g,'&quot;'); }
-function escJs(s) { if (!s) return ''; return String(s).replace(/\\/g,'\\\\').replace(/'/g,"\\'").replace(/"/g,'\\"').replace(/\n/g,'\\n'); }
+// Single-pass escapes: one regex scan per string instead of one per escaped character
+const ESC_MAP = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;' };
+const ESC_JS_MAP = { '\\': '\\\\', "'": "\\'", '"': '\\"', '\n': '\\n' };
+function esc(s) { if (!s) return ''; return String(s).replace(/[&<>"]/g, c => ESC_MAP[c]); }
+function escJs(s) { if (!s) return ''; return String(s).replace(/[\\'"\n]/g, c => ESC_JS_MAP[c]); }
+
+// Formatted costs per prefix; the data only has a few dozen distinct strings
+const formatCostCache = {};
 
 function formatCost(s, prefix) {
   if (!s || s === '-') return s || '';
   if (prefix === undefined) prefix = '$';
+  const cache = formatCostCache[prefix] || (formatCostCache[prefix] = new Map());
+  let out = cache.get(s);
+  if (out === undefined) {
+    out = formatCostParts(s, prefix);
+    cache.set(s, out);
+  }
+  return out;
+}
+
+function formatCostParts(s, prefix) {
   // Split on newlines, then fix each part: "20RAZDOR/SILNY" -> "$20 Razdor/Silny"
   return s.split(/\n/).map(part => {
     part = part.trim();
@@ -1371,6 +1456,17 @@ function formatCost(s, prefix) {
 }
 const LUX_ICON = '✨';
 
+// "Diamond x2" -> "Diamond"
+const stoneNameCache = new Map();
+function stoneName(s) {
+  let name = stoneNameCache.get(s);
+  if (name === undefined) {
+    name = s.replace(/\s*x\d+/i, '').trim();
+    stoneNameCache.set(s, name);
+  }
+  return name;
+}
+
 function ratingStars(r) {
   if (!r) return '';
   return '<span class="rating">' + esc(r) + '</span>';
@@ -1380,14 +1476,56 @@ function ratingStars(r) {
 const materialToEnemies = {};
 const materialToCraft = {};
 const materialToMarket = {};
+// Material -> Map of enemy name -> that enemy's dropping entries (first-seen order)
+const materialToEnemyGroups = {};
+// Lowercased text of every searchable field per enemy/craft entry, joined
+// with newlines. Typed queries never contain a newline, so a match can't
+// straddle two fields.
+const searchText = new WeakMap();
+// Item name -> its prerequisite chain up to and including that item
+const prereqChainByName = new Map();
+// Craftable item or building name -> entry, for the route planner
+const routeItemByName = new Map();
+// Enemy entries grouped by name in first-seen order, one group per card
+const enemyGroups = [];
+// Craft item -> its material, wood and ore costs as one list, in display
+// order: { name, info, need }
+const craftMatRows = new WeakMap();
+// Material -> Set of its trimmed harvest location parts ("12", "Ice Caves: X")
+const harvestLocationParts = new Map();
+// Enemy entry -> material name of each drop, aligned with e.materialDrops
+// ("Feathers (FW only)" -> "Feathers")
+const dropMaterialNames = new WeakMap();
+
+function deepFreeze(o) {
+  if (o && typeof o === 'object' && !Object.isFrozen(o)) {
+    Object.freeze(o);
+    for (const k in o) deepFreeze(o[k]);
+  }
+  return o;
+}
 
 function buildIndices() {
+  // Buildings only list wood and ores; give them the same cost shape as
+  // craft items so route code can treat all three alike
+  DATA.buildings.forEach(b => { if (!b.materials) b.materials = {}; });
+  // DATA is read-only from here on: the indexes below and the render
+  // caches all assume it never changes
+  deepFreeze(DATA);
+
   // Enemies -> materials
   DATA.enemies.forEach(e => {
-    e.materialDrops.forEach(d => {
-      let matName = d.includes('(') ? d.substring(0, d.indexOf('(')).trim() : d;
-      if (!materialToEnemies[matName]) materialToEnemies[matName] = [];
+    const names = e.materialDrops.map(d => d.includes('(') ? d.substring(0, d.indexOf('(')).trim() : d);
+    dropMaterialNames.set(e, names);
+    names.forEach(matName => {
+      if (!materialToEnemies[matName]) {
+        materialToEnemies[matName] = [];
+        materialToEnemyGroups[matName] = new Map();
+      }
       materialToEnemies[matName].push(e);
+      const groups = materialToEnemyGroups[matName];
+      if (!groups.has(e.name)) groups.set(e.name, []);
+      groups.get(e.name).push(e);
     });
   });
 
@@ -1400,7 +1538,7 @@ function buildIndices() {
       });
     });
     if (item.speakingStone) {
-      let sName = item.speakingStone.replace(/\s*x\d+/i, '');
+      let sName = stoneName(item.speakingStone);
       if (!materialToCraft[sName]) materialToCraft[sName] = [];
       materialToCraft[sName].push({ name: item.name, type: 'armor-weapon', item, usedAs: 'stone' });
     }
@@ -1415,7 +1553,7 @@ function buildIndices() {
       });
     });
     if (item.speakingStone) {
-      let sName = item.speakingStone.replace(/\s*x\d+/i, '');
+      let sName = stoneName(item.speakingStone);
       if (!materialToCraft[sName]) materialToCraft[sName] = [];
       materialToCraft[sName].push({ name: item.name, type: 'accessory', item, usedAs: 'stone' });
     }
@@ -1425,31 +1563,94 @@ function buildIndices() {
   DATA.market.forEach(item => {
     materialToMarket[item.name] = item;
   });
+
+  // Harvest locations
+  for (const [mat, locs] of Object.entries(DATA.harvestLocations)) {
+    if (locs) harvestLocationParts.set(mat, new Set(String(locs).split(',').map(p => p.trim())));
+  }
+
+  // Search text
+  DATA.enemies.forEach(e => {
+    searchText.set(e, [e.name, ...e.materialDrops, e.itemDrop, ...Object.values(e.locations)].join('\n').toLowerCase());
+  });
+  [...DATA.armorWeapons, ...DATA.accessories].forEach(i => {
+    searchText.set(i, [i.name, i.city, i.limitedTo, i.type, i.effect, i.prerequisite,
+      ...Object.keys(i.materials), ...Object.keys(i.wood), ...Object.keys(i.ores)].join('\n').toLowerCase());
+  });
+
+  // Craft costs
+  [...DATA.armorWeapons, ...DATA.accessories].forEach(item => {
+    const rows = [];
+    [item.materials, item.wood, item.ores].forEach(group => {
+      Object.entries(group).forEach(([name, info]) => rows.push({ name, info, need: parseInt(info.qty || info) || 0 }));
+    });
+    craftMatRows.set(item, rows);
+  });
+
+  [...DATA.armorWeapons, ...DATA.accessories, ...DATA.buildings].forEach(i => {
+    if (!routeItemByName.has(i.name)) routeItemByName.set(i.name, i);
+  });
+
+  // Enemy cards
+  const groupByName = new Map();
+  DATA.enemies.forEach(e => {
+    let g = groupByName.get(e.name);
+    if (!g) {
+      g = { name: e.name, entries: [], ratings: new Set(), html: null, locsHtml: new Map() };
+      groupByName.set(e.name, g);
+      enemyGroups.push(g);
+    }
+    g.entries.push(e);
+    g.ratings.add(e.rating);
+  });
+  enemyGroups.forEach(g => groupLocationsHtml(g, g.entries));
+
+  // Prerequisite chains (first chain listing an item wins)
+  DATA.prereqChains.forEach(chain => chain.forEach((c, idx) => {
+    if (!prereqChainByName.has(c.name)) prereqChainByName.set(c.name, chain.slice(0, idx + 1));
+  }));
 }
 
 // --- All unique materials ---
+// Sorted once; the data never changes after load
+let allMaterials = null;
+
 function getAllMaterials() {
+  if (allMaterials) return allMaterials;
   const mats = new Set();
-  DATA.enemies.forEach(e => e.materialDrops.forEach(d => {
-    mats.add(d.includes('(') ? d.substring(0, d.indexOf('(')).trim() : d);
-  }));
+  DATA.enemies.forEach(e => dropMaterialNames.get(e).forEach(m => mats.add(m)));
   DATA.armorWeapons.forEach(i => {
     [i.materials, i.wood, i.ores].forEach(g => Object.keys(g).forEach(m => mats.add(m)));
   });
   DATA.accessories.forEach(i => {
     [i.materials, i.wood, i.ores].forEach(g => Object.keys(g).forEach(m => mats.add(m)));
   });
-  return [...mats].sort();
+  allMaterials = [...mats].sort();
+  return allMaterials;
 }
 
 // --- Navigation ---
+// Detail panels by type and name. They also show owned resources, market
+// reputation and completed buildings, so the save functions for those
+// clear the cache.
+const detailHtmlCache = new Map();
+
 function showDetail(type, identifier) {
-  const overlay = document.getElementById('overlay');
-  const content = document.getElementById('detail-content');
+  const key = type + '\n' + identifier;
+  let html = detailHtmlCache.get(key);
+  if (html === undefined) {
+    html = buildDetailHtml(type, identifier);
+    if (html === null) return;
+    detailHtmlCache.set(key, html);
+  }
+  document.getElementById('detail-content').innerHTML = html;
+  document.getElementById('overlay').classList.add('active');
+}
 
+function buildDetailHtml(type, identifier) {
   if (type === 'enemy') {
     const entries = DATA.enemies.filter(e => e.name === identifier);
-    if (!entries.length) return;
+    if (!entries.length) return null;
     let html = '<h2>' + esc(identifier) + '</h2>';
     html += '<div class="card-subtitle">Enemy</div>';
 
@@ -1468,15 +1669,15 @@ function showDetail(type, identifier) {
       if (Object.keys(e.locations).length) {
         html += '<div class="section-label">Locations</div>';
         Object.entries(e.locations).forEach(([ch, loc]) => {
-          html += '<div style="font-size:0.85rem;margin-bottom:2px;"><span style="color:var(--text2);">' + esc(ch) + ':</span> <span style="color:var(--green);">' + esc(loc) + '</span></div>';
+          html += '<div style="font-size:0.85rem;margin-bottom:2px;"><span style="color:var(--text2);">' + esc(ch) + ':</span> <span class="loc-text">' + esc(loc) + '</span></div>';
         });
       }
 
       if (e.materialDrops.length) {
         html += '<div class="section-label">Material Drops</div><div class="tag-list">';
-        e.materialDrops.forEach(d => {
-          let matName = d.includes('(') ? d.substring(0, d.indexOf('(')).trim() : d;
-          html += '<a class="tag" onclick="showDetail(\'material\',\'' + escJs(matName) + '\')">' + esc(d) + '</a>';
+        const matNames = dropMaterialNames.get(e);
+        e.materialDrops.forEach((d, i) => {
+          html += '<a class="tag" data-detail="material" data-id="' + esc(matNames[i]) + '">' + esc(d) + '</a>';
         });
         html += '</div>';
       }
@@ -1492,7 +1693,7 @@ function showDetail(type, identifier) {
       html += '</div>';
     });
 
-    content.innerHTML = html;
+    return html;
 
   } else if (type === 'craft' || type === 'armor-weapon' || type === 'accessory') {
     let item = DATA.armorWeapons.find(i => i.name === identifier);
@@ -1501,7 +1702,7 @@ function showDetail(type, identifier) {
       item = DATA.accessories.find(i => i.name === identifier);
       itemType = 'accessory';
     }
-    if (!item) return;
+    if (!item) return null;
 
     let html = '<h2>' + esc(item.name) + '</h2>';
     html += '<div class="card-subtitle">';
@@ -1529,14 +1730,14 @@ function showDetail(type, identifier) {
     // Prerequisite
     if (item.prerequisite) {
       html += '<h3>Prerequisite Equipment</h3>';
-      html += '<a class="tag craft" onclick="showDetail(\'craft\',\'' + escJs(item.prerequisite) + '\')">' + esc(item.prerequisite) + '</a>';
+      html += '<a class="tag craft" data-detail="craft" data-id="' + esc(item.prerequisite) + '">' + esc(item.prerequisite) + '</a>';
 
       // Show chain
       let chain = findPrereqChain(item.name);
       if (chain && chain.length > 1) {
         html += '<div class="prereq-chain">';
         chain.forEach((c, i) => {
-          html += '<a class="chain-item" onclick="showDetail(\'craft\',\'' + escJs(c.name) + '\')">' + esc(c.name) + ' ' + ratingStars(c.rating) + '</a>';
+          html += '<a class="chain-item" data-detail="craft" data-id="' + esc(c.name) + '">' + esc(c.name) + ' ' + ratingStars(c.rating) + '</a>';
           if (i < chain.length - 1) html += '<span class="chain-arrow">&rarr;</span>';
         });
         html += '</div>';
@@ -1552,53 +1753,46 @@ function showDetail(type, identifier) {
     // Speaking Stone
     if (item.speakingStone) {
       html += '<h3>Speaking Stone Required</h3>';
-      let stName = item.speakingStone.replace(/\s*x\d+/i, '').trim();
-      html += '<a class="tag item" onclick="showDetail(\'stone\',\'' + escJs(stName) + '\')">' + esc(item.speakingStone) + '</a>';
+      let stName = stoneName(item.speakingStone);
+      html += '<a class="tag item" data-detail="stone" data-id="' + esc(stName) + '">' + esc(item.speakingStone) + '</a>';
     }
 
     // Crafting materials
-    let hasMats = Object.keys(item.materials).length || Object.keys(item.wood).length || Object.keys(item.ores).length;
+    const matRows = craftMatRows.get(item);
+    let hasMats = matRows.length;
     if (hasMats) {
       html += '<h3>Crafting Materials</h3>';
       let detailRes = getResources();
       html += '<table class="recipe-table"><tr><th>Material</th><th>Owned</th><th>Qty</th><th>Qty (2 Rep)</th><th>Source</th></tr>';
 
-      const renderMats = (group, category) => {
-        Object.entries(group).forEach(([mat, info]) => {
-          let source = '';
-          if (materialToEnemies[mat]) {
-            let names = [...new Set(materialToEnemies[mat].map(e => e.name))];
-            source = names.map(n => '<a onclick="showDetail(\'enemy\',\'' + escJs(n) + '\')" style="color:var(--red)">' + esc(n) + '</a>').join(', ');
-          }
-          if (materialToMarket[mat]) {
-            let mkt = materialToMarket[mat];
-            let townParts = [];
-            Object.entries(mkt.prices).forEach(([town, p]) => {
-              let price = getMarketBuyPrice(mat, town);
-              if (price) townParts.push(esc(town) + ' ' + esc(price));
-            });
-            if (townParts.length) {
-              if (source) source += ' | ';
-              source += '<span style="color:var(--green)">Market: ' + townParts.join(', ') + '</span>';
-            }
+      matRows.forEach(({ name: mat, info, need: needed }) => {
+        let source = '';
+        if (materialToEnemies[mat]) {
+          source = [...materialToEnemyGroups[mat].keys()].map(n => '<a data-detail="enemy" data-id="' + esc(n) + '" style="color:var(--red)">' + esc(n) + '</a>').join(', ');
+        }
+        if (materialToMarket[mat]) {
+          let mkt = materialToMarket[mat];
+          let townParts = [];
+          for (const town in mkt.prices) {
+            let price = getMarketBuyPrice(mat, town);
+            if (price) townParts.push(esc(town) + ' ' + esc(price));
           }
-          if (DATA.harvestLocations[mat]) {
+          if (townParts.length) {
             if (source) source += ' | ';
-            source += '<span style="color:var(--orange)">Nodes: ' + esc(DATA.harvestLocations[mat]) + '</span>';
+            source += '<span class="loc-text">Market: ' + townParts.join(', ') + '</span>';
           }
-          let owned = detailRes[mat] || 0;
-          let needed = parseInt(info.qty || info) || 0;
-          let ownColor = owned >= needed ? 'var(--green)' : 'var(--red)';
-          html += '<tr><td><a onclick="showDetail(\'material\',\'' + escJs(mat) + '\')">' + esc(mat) + '</a></td>';
-          html += '<td style="color:' + ownColor + ';font-weight:600;">' + owned + '</td>';
-          html += '<td>' + esc(info.qty || info) + '</td><td>' + esc(info.rep2 || info['2R'] || '') + '</td>';
-          html += '<td style="font-size:0.8rem;">' + (source || '-') + '</td></tr>';
-        });
-      };
-
-      if (Object.keys(item.materials).length) renderMats(item.materials, 'Monster');
-      if (Object.keys(item.wood).length) renderMats(item.wood, 'Wood');
-      if (Object.keys(item.ores).length) renderMats(item.ores, 'Ore');
+        }
+        if (DATA.harvestLocations[mat]) {
+          if (source) source += ' | ';
+          source += '<span style="color:var(--orange)">Nodes: ' + esc(DATA.harvestLocations[mat]) + '</span>';
+        }
+        let owned = detailRes[mat] || 0;
+        let ownColor = owned >= needed ? 'var(--green)' : 'var(--red)';
+        html += '<tr><td><a data-detail="material" data-id="' + esc(mat) + '">' + esc(mat) + '</a></td>';
+        html += '<td style="color:' + ownColor + ';font-weight:600;">' + owned + '</td>';
+        html += '<td>' + esc(info.qty || info) + '</td><td>' + esc(info.rep2 || info['2R'] || '') + '</td>';
+        html += '<td style="font-size:0.8rem;">' + (source || '-') + '</td></tr>';
+      });
       html += '</table>';
     }
 
@@ -1610,7 +1804,7 @@ function showDetail(type, identifier) {
       html += '</div>';
     }
 
-    content.innerHTML = html;
+    return html;
 
   } else if (type === 'material') {
     let html = '<h2>' + esc(identifier) + '</h2>';
@@ -1619,18 +1813,13 @@ function showDetail(type, identifier) {
     // Dropped by enemies
     if (materialToEnemies[identifier]) {
       html += '<h3>Dropped By Enemies</h3>';
-      let uniqueEnemies = {};
-      materialToEnemies[identifier].forEach(e => {
-        if (!uniqueEnemies[e.name]) uniqueEnemies[e.name] = [];
-        uniqueEnemies[e.name].push(e);
-      });
-      Object.entries(uniqueEnemies).forEach(([name, entries]) => {
+      materialToEnemyGroups[identifier].forEach((entries, name) => {
         html += '<div style="margin-bottom:8px;padding:8px;background:var(--bg);border-radius:4px;">';
-        html += '<a onclick="showDetail(\'enemy\',\'' + escJs(name) + '\')" style="font-weight:600;color:var(--red);">' + esc(name) + '</a>';
-        html += '<div style="font-size:0.82rem;color:var(--text2);margin-top:4px;">';
+        html += '<a data-detail="enemy" data-id="' + esc(name) + '" style="font-weight:600;color:var(--red);">' + esc(name) + '</a>';
+        html += '<div class="sub-note">';
         entries.forEach(e => {
           let locs = Object.values(e.locations).join(', ');
-          html += ratingStars(e.rating) + ' ' + (locs ? '<span style="color:var(--green)">' + esc(locs) + '</span>' : 'Location varies') + '<br>';
+          html += ratingStars(e.rating) + ' ' + (locs ? '<span class="loc-text">' + esc(locs) + '</span>' : 'Location varies') + '<br>';
         });
         html += '</div></div>';
       });
@@ -1657,7 +1846,7 @@ function showDetail(type, identifier) {
         html += '<div style="color:var(--gold);font-size:0.85rem;margin-top:4px;">Lux cost to buy x4: ' + esc(DATA.resourceLuxCosts[identifier]) + '</div>';
       } else {
         let reqB = WOOD_MATS.includes(identifier) ? 'Lumbermill (Upgraded)' : 'Lapidary';
-        html += '<div style="color:var(--text2);font-size:0.85rem;margin-top:4px;">Lux cost to buy x4: <span style="text-decoration:line-through;">' + esc(DATA.resourceLuxCosts[identifier]) + '</span> <span style="color:var(--red);">(requires ' + esc(reqB) + ')</span></div>';
+        html += '<div style="color:var(--text2);font-size:0.85rem;margin-top:4px;">Lux cost to buy x4: <span class="struck">' + esc(DATA.resourceLuxCosts[identifier]) + '</span> <span style="color:var(--red);">(requires ' + esc(reqB) + ')</span></div>';
       }
     }
 
@@ -1668,17 +1857,17 @@ function showDetail(type, identifier) {
         html += '<h3>Used to Craft</h3>';
         html += '<div class="tag-list" style="gap:6px;">';
         matCrafts.forEach(c => {
-          html += '<a class="tag craft" onclick="showDetail(\'craft\',\'' + escJs(c.name) + '\')">' + esc(c.name) + '</a>';
+          html += '<a class="tag craft" data-detail="craft" data-id="' + esc(c.name) + '">' + esc(c.name) + '</a>';
         });
         html += '</div>';
       }
     }
 
-    content.innerHTML = html;
+    return html;
 
   } else if (type === 'stone') {
     let stone = DATA.speakingStones.find(s => s.name === identifier);
-    if (!stone) return;
+    if (!stone) return null;
     let html = '<h2>' + esc(stone.name) + '</h2>';
     html += '<div class="card-subtitle">Speaking Stone</div>';
     html += '<div class="stat-row">';
@@ -1691,7 +1880,7 @@ function showDetail(type, identifier) {
       if (canBuyStones()) {
         html += '<div style="font-size:0.85rem;color:var(--text2);">Lapidary Exchange: ' + esc(stone.lapidaryExchange) + '</div>';
       } else {
-        html += '<div style="font-size:0.85rem;color:var(--text2);">Lapidary Exchange: <span style="text-decoration:line-through;">' + esc(stone.lapidaryExchange) + '</span> <span style="color:var(--red);">(requires Lapidary (Upgraded))</span></div>';
+        html += '<div style="font-size:0.85rem;color:var(--text2);">Lapidary Exchange: <span class="struck">' + esc(stone.lapidaryExchange) + '</span> <span style="color:var(--red);">(requires Lapidary (Upgraded))</span></div>';
       }
     }
 
@@ -1702,127 +1891,185 @@ function showDetail(type, identifier) {
         html += '<h3>Used to Craft</h3>';
         html += '<div class="tag-list" style="gap:6px;">';
         stoneCrafts.forEach(c => {
-          html += '<a class="tag craft" onclick="showDetail(\'craft\',\'' + escJs(c.name) + '\')">' + esc(c.name) + '</a>';
+          html += '<a class="tag craft" data-detail="craft" data-id="' + esc(c.name) + '">' + esc(c.name) + '</a>';
         });
         html += '</div>';
       }
     }
 
-    content.innerHTML = html;
+    return html;
   }
-
-  overlay.classList.add('active');
+  return null;
 }
 
 function findPrereqChain(itemName) {
-  for (const chain of DATA.prereqChains) {
-    let idx = chain.findIndex(c => c.name === itemName);
-    if (idx >= 0) return chain.slice(0, idx + 1);
-  }
-  return null;
+  return prereqChainByName.get(itemName) || null;
 }
 
 // --- Render functions ---
-function renderEnemies(filter, search) {
-  const grid = document.getElementById('enemy-grid');
-  let grouped = {};
-  DATA.enemies.forEach(e => {
-    if (filter !== 'all' && e.rating !== filter) return;
-    if (search && !matchesSearch(e, search)) return;
-    if (!grouped[e.name]) grouped[e.name] = [];
-    grouped[e.name].push(e);
-  });
-
-  if (!Object.keys(grouped).length) {
-    grid.innerHTML = '<div class="empty-msg">No enemies match your filters.</div>';
-    return;
-  }
+// Grid and table re-renders are written to the DOM on the next animation
+// frame, so several renders in one frame (fast typing, a filter click
+// that also refreshes the search) cost a single HTML parse and layout.
+const pendingHtml = new Map();
+
+function setHtmlNextFrame(el, html) {
+  if (!pendingHtml.size) requestAnimationFrame(flushPendingHtml);
+  pendingHtml.set(el, html);
+}
 
-  let html = '';
-  Object.entries(grouped).forEach(([name, entries]) => {
-    html += '<div class="card">';
-    html += '<div class="card-title"><a onclick="showDetail(\'enemy\',\'' + escJs(name) + '\')">' + esc(name) + '</a></div>';
+function flushPendingHtml() {
+  pendingHtml.forEach((html, el) => { el.innerHTML = html; });
+  pendingHtml.clear();
+}
 
-    entries.forEach(e => {
-      html += '<div style="margin-bottom:6px;">';
-      html += '<div style="display:flex;align-items:center;gap:8px;margin-bottom:3px;">' + ratingStars(e.rating);
-      html += '<span class="stat attack"><span class="stat-label">ATK</span><span class="stat-value">' + esc(e.attack) + '</span></span>';
-      html += '<span class="stat defense"><span class="stat-label">DEF</span><span class="stat-value">' + esc(e.defense) + '</span></span>';
-      html += '<span class="stat ap"><span class="stat-label">AP</span><span class="stat-value">' + esc(e.ap) + '</span></span>';
-      html += '<span class="stat hp"><span class="stat-label">HP</span><span class="stat-value">' + esc(e.hp) + '</span></span>';
-      if (e.lux) html += '<span class="stat lux"><span class="stat-label">Lux</span><span class="stat-value">' + LUX_ICON + esc(e.lux) + '</span></span>';
-      html += '</div>';
+// Per-rating enemy rows never change after load, so each row's markup is
+// built once and reused across filter and search changes.
+const enemyRowHtmlCache = new WeakMap();
+
+function renderEnemyRowHtml(e) {
+  let html = enemyRowHtmlCache.get(e);
+  if (html !== undefined) return html;
+  html = '<div style="margin-bottom:6px;">';
+  html += '<div style="display:flex;align-items:center;gap:8px;margin-bottom:3px;">' + ratingStars(e.rating);
+  html += '<span class="stat attack"><span class="stat-label">ATK</span><span class="stat-value">' + esc(e.attack) + '</span></span>';
+  html += '<span class="stat defense"><span class="stat-label">DEF</span><span class="stat-value">' + esc(e.defense) + '</span></span>';
+  html += '<span class="stat ap"><span class="stat-label">AP</span><span class="stat-value">' + esc(e.ap) + '</span></span>';
+  html += '<span class="stat hp"><span class="stat-label">HP</span><span class="stat-value">' + esc(e.hp) + '</span></span>';
+  if (e.lux) html += '<span class="stat lux"><span class="stat-label">Lux</span><span class="stat-value">' + LUX_ICON + esc(e.lux) + '</span></span>';
+  html += '</div>';
 
-      if (e.materialDrops.length) {
-        html += '<div class="tag-list">';
-        e.materialDrops.forEach(d => {
-          let matName = d.includes('(') ? d.substring(0, d.indexOf('(')).trim() : d;
-          html += '<a class="tag" onclick="event.stopPropagation();showDetail(\'material\',\'' + escJs(matName) + '\')">' + esc(d) + '</a>';
-        });
-        html += '</div>';
-      }
-      if (e.itemDrop) html += '<span class="tag item" style="margin-top:3px;">' + esc(e.itemDrop) + '</span>';
-      html += '</div>';
+  if (e.materialDrops.length) {
+    html += '<div class="tag-list">';
+    const matNames = dropMaterialNames.get(e);
+    e.materialDrops.forEach((d, i) => {
+      html += '<a class="tag" data-detail="material" data-id="' + esc(matNames[i]) + '">' + esc(d) + '</a>';
     });
+    html += '</div>';
+  }
+  if (e.itemDrop) html += '<span class="tag item" style="margin-top:3px;">' + esc(e.itemDrop) + '</span>';
+  html += '</div>';
+  enemyRowHtmlCache.set(e, html);
+  return html;
+}
 
-    // Compact locations
-    let allLocs = {};
-    entries.forEach(e => Object.entries(e.locations).forEach(([ch, loc]) => {
+// Merged locations block for some entries of an enemy group, cached on the
+// group by entry positions (filtered cards show a subset)
+function groupLocationsHtml(g, entries) {
+  const key = entries.map(e => g.entries.indexOf(e)).join(',');
+  let html = g.locsHtml.get(key);
+  if (html !== undefined) return html;
+  html = '';
+  let allLocs = {};
+  let hasLocs = false;
+  for (const e of entries) {
+    for (const ch in e.locations) {
       if (!allLocs[ch]) allLocs[ch] = new Set();
-      loc.split(',').forEach(l => allLocs[ch].add(l.trim()));
-    }));
-    if (Object.keys(allLocs).length) {
-      html += '<div class="locations-list">';
-      Object.entries(allLocs).forEach(([ch, locs]) => {
-        html += '<div><span style="color:var(--text2);font-size:0.78rem;">' + esc(ch) + ':</span> <span>' + esc([...locs].join(', ')) + '</span></div>';
-      });
-      html += '</div>';
+      for (const l of e.locations[ch].split(',')) allLocs[ch].add(l.trim());
+      hasLocs = true;
+    }
+  }
+  if (hasLocs) {
+    html += '<div class="locations-list">';
+    for (const ch in allLocs) {
+      html += '<div><span style="color:var(--text2);font-size:0.78rem;">' + esc(ch) + ':</span> <span>' + esc([...allLocs[ch]].join(', ')) + '</span></div>';
     }
-
     html += '</div>';
+  }
+  g.locsHtml.set(key, html);
+  return html;
+}
+
+function renderEnemyCardHtml(g, entries) {
+  let html = '<div class="card">';
+  html += '<div class="card-title"><a data-detail="enemy" data-id="' + esc(g.name) + '">' + esc(g.name) + '</a></div>';
+  entries.forEach(e => { html += renderEnemyRowHtml(e); });
+  html += groupLocationsHtml(g, entries);
+  html += '</div>';
+  return html;
+}
+
+function renderEnemies(filter, search) {
+  const grid = document.getElementById('enemy-grid');
+  const q = search.toLowerCase();
+  let html = '';
+  enemyGroups.forEach(g => {
+    if (filter !== 'all' && !g.ratings.has(filter)) return;
+    let entries = g.entries;
+    if (filter !== 'all' || q) {
+      entries = entries.filter(e => (filter === 'all' || e.rating === filter) && (!q || matchesSearch(e, q)));
+      if (!entries.length) return;
+    }
+    // A card showing every entry of its enemy is the same on every render
+    if (entries.length === g.entries.length) {
+      if (g.html === null) g.html = renderEnemyCardHtml(g, g.entries);
+      html += g.html;
+    } else {
+      html += renderEnemyCardHtml(g, entries);
+    }
   });
-  grid.innerHTML = html;
+
+  if (!html) {
+    setHtmlNextFrame(grid, '<div class="empty-msg">No enemies match your filters.</div>');
+    return;
+  }
+
+  setHtmlNextFrame(grid, html);
 }
 
 function renderArmorWeapons(typeFilter, ratingFilter, search) {
   const grid = document.getElementById('aw-grid');
+  const q = search.toLowerCase();
   let filtered = DATA.armorWeapons.filter(i => {
     if (typeFilter !== 'all' && i.type !== typeFilter) return false;
     if (ratingFilter !== 'all' && i.rating !== ratingFilter) return false;
-    if (search && !matchesSearchCraft(i, search)) return false;
+    if (q && !matchesSearch(i, q)) return false;
     if (!itemMatchesHeroes(i)) return false;
     return true;
   });
 
   if (!filtered.length) {
-    grid.innerHTML = '<div class="empty-msg">No items match your filters.</div>';
+    setHtmlNextFrame(grid, '<div class="empty-msg">No items match your filters.</div>');
     return;
   }
 
-  grid.innerHTML = filtered.map(item => renderCraftCard(item, 'armor-weapon')).join('');
+  setHtmlNextFrame(grid, filtered.map(item => renderCraftCard(item, 'armor-weapon')).join(''));
 }
 
 function renderAccessories(typeFilter, search) {
   const grid = document.getElementById('acc-grid');
+  const q = search.toLowerCase();
   let filtered = DATA.accessories.filter(i => {
     if (typeFilter !== 'all' && i.type !== typeFilter) return false;
-    if (search && !matchesSearchCraft(i, search)) return false;
+    if (q && !matchesSearch(i, q)) return false;
     return true;
   });
 
   if (!filtered.length) {
-    grid.innerHTML = '<div class="empty-msg">No items match your filters.</div>';
+    setHtmlNextFrame(grid, '<div class="empty-msg">No items match your filters.</div>');
     return;
   }
 
-  grid.innerHTML = filtered.map(item => renderCraftCard(item, 'accessory')).join('');
+  setHtmlNextFrame(grid, filtered.map(item => renderCraftCard(item, 'accessory')).join(''));
 }
 
-function renderCraftCard(item, type) {
-  let html = '<div class="card">';
-  html += '<div class="card-title"><a onclick="showDetail(\'craft\',\'' + escJs(item.name) + '\')">' + esc(item.name) + '</a>';
-  if (item.rating) html += ' ' + ratingStars(item.rating);
-  html += '<!--CRAFT_BADGE--></div>';
+// Craft card markup depends only on the item and the owned resources, so
+// cards are cached per item until saveResources() changes what is owned.
+const craftCardHtmlCache = new Map();
+
+function renderCraftCard(item, type) {
+  let html = craftCardHtmlCache.get(item);
+  if (html === undefined) {
+    html = buildCraftCardHtml(item);
+    craftCardHtmlCache.set(item, html);
+  }
+  return html;
+}
+
+function buildCraftCardHtml(item) {
+  let html = '<div class="card">';
+  html += '<div class="card-title"><a data-detail="craft" data-id="' + esc(item.name) + '">' + esc(item.name) + '</a>';
+  if (item.rating) html += ' ' + ratingStars(item.rating);
+  html += '<!--CRAFT_BADGE--></div>';
 
   let sub = [];
   if (item.type) sub.push(item.type);
@@ -1844,16 +2091,14 @@ function renderCraftCard(item, type) {
 
   if (item.prerequisite) {
     html += '<div class="section-label">Requires</div>';
-    html += '<a class="tag craft" onclick="event.stopPropagation();showDetail(\'craft\',\'' + escJs(item.prerequisite) + '\')">' + esc(item.prerequisite) + '</a>';
+    html += '<a class="tag craft" data-detail="craft" data-id="' + esc(item.prerequisite) + '">' + esc(item.prerequisite) + '</a>';
   }
 
   // Show materials compactly with owned/needed
   let mats = [];
   const myRes = getResources();
   let allMet = true;
-  Object.entries(item.materials || {}).forEach(([m, info]) => { let need = parseInt(info.qty || info) || 0; mats.push({name:m, need}); });
-  Object.entries(item.wood || {}).forEach(([m, info]) => { let need = parseInt(info.qty || info) || 0; mats.push({name:m, need}); });
-  Object.entries(item.ores || {}).forEach(([m, info]) => { let need = parseInt(info.qty || info) || 0; mats.push({name:m, need}); });
+  craftMatRows.get(item).forEach(r => mats.push({name: r.name, need: r.need}));
   if (item.speakingStone) mats.push({name: item.speakingStone, need: 0, raw: true});
   if (item.itemRequired) mats.push({name: item.itemRequired, need: 0, raw: true});
 
@@ -1864,11 +2109,11 @@ function renderCraftCard(item, type) {
     html += '<div class="section-label">Materials</div><div class="tag-list">';
     mats.forEach(m => {
       if (m.raw) {
-        html += '<a class="tag" onclick="event.stopPropagation();showDetail(\'material\',\'' + escJs(m.name.replace(/\s*x\d+.*/i,'').trim()) + '\')">' + esc(m.name) + '</a>';
+        html += '<a class="tag" data-detail="material" data-id="' + esc(m.name.replace(/\s*x\d+.*/i,'').trim()) + '">' + esc(m.name) + '</a>';
       } else {
         let owned = myRes[m.name] || 0;
         let cls = owned >= m.need ? 'mat-have' : 'mat-need';
-        html += '<a class="tag ' + cls + '" onclick="event.stopPropagation();showDetail(\'material\',\'' + escJs(m.name) + '\')">' + esc(m.name) + ' ' + owned + '/' + m.need + '</a>';
+        html += '<a class="tag ' + cls + '" data-detail="material" data-id="' + esc(m.name) + '">' + esc(m.name) + ' ' + owned + '/' + m.need + '</a>';
       }
     });
     html += '</div>';
@@ -1882,8 +2127,8 @@ function renderCraftCard(item, type) {
 
   if (hasCraftMats) {
     html += '<div class="card-actions">';
-    html += '<button class="card-route-btn" onclick="event.stopPropagation();addToRouteAndGo(\'' + escJs(item.name) + '\')">Plan Route</button>';
-    html += '<button class="card-route-btn" onclick="event.stopPropagation();addToRoutePlanner(\'' + escJs(item.name) + '\')">+ Add to Route</button>';
+    html += '<button class="card-route-btn" data-action="route-go" data-id="' + esc(item.name) + '">Plan Route</button>';
+    html += '<button class="card-route-btn" data-action="route-add" data-id="' + esc(item.name) + '">+ Add to Route</button>';
     html += '</div>';
   }
 
@@ -1891,15 +2136,32 @@ function renderCraftCard(item, type) {
   return html;
 }
 
+// Market tables keyed by the reputation settings they were built for;
+// only the Base / 2 Rep toggles change the table after load
+const marketHtmlCache = new Map();
+
 function renderMarket() {
   const container = document.getElementById('market-content');
-  const towns = ['Mir', 'Razdor', 'Ryba', 'Silny', 'Strofa', 'Vouno', 'Fort Istra Apothecary'];
   const rep = getMarketRep();
+  const key = JSON.stringify(rep);
+  let html = marketHtmlCache.get(key);
+  if (html === undefined) {
+    html = buildMarketHtml(rep);
+    marketHtmlCache.set(key, html);
+  }
+  setHtmlNextFrame(container, html);
+}
+
+const MARKET_TOWNS = ['Mir', 'Razdor', 'Ryba', 'Silny', 'Strofa', 'Vouno', 'Fort Istra Apothecary'];
+// First header row; town names are fixed and need no escaping
+const MARKET_TOWN_HEADER = '<tr><th rowspan="2">Item</th><th rowspan="2">Effect</th>' +
+  MARKET_TOWNS.map(t => '<th class="town-header" colspan="3">' + t + '</th>').join('') + '</tr>';
+
+function buildMarketHtml(rep) {
+  const towns = MARKET_TOWNS;
 
   let html = '<div class="market-wrap"><table class="market-table"><thead>';
-  html += '<tr><th rowspan="2">Item</th><th rowspan="2">Effect</th>';
-  towns.forEach(t => html += '<th class="town-header" colspan="3">' + esc(t) + '</th>');
-  html += '</tr><tr>';
+  html += MARKET_TOWN_HEADER + '<tr>';
   towns.forEach(t => {
     if (t === 'Fort Istra Apothecary') {
       html += '<th colspan="2" style="text-align:center;color:var(--text2);">-</th><th class="sell" style="color:var(--gold);">Sell (' + LUX_ICON + ')</th>';
@@ -1930,8 +2192,8 @@ function renderMarket() {
   const isLuxTown = (t) => t === 'Fort Istra Apothecary';
 
   DATA.market.forEach(item => {
-    html += '<tr><td><a onclick="showDetail(\'material\',\'' + escJs(item.name) + '\')" style="font-weight:600;">' + esc(item.name) + '</a></td>';
-    html += '<td style="font-size:0.8rem;color:var(--text2);max-width:200px;">' + esc(item.effect) + '</td>';
+    html += '<tr><td><a data-detail="material" data-id="' + esc(item.name) + '" class="mk-name">' + esc(item.name) + '</a></td>';
+    html += '<td class="mk-effect">' + esc(item.effect) + '</td>';
     towns.forEach(t => {
       let p = item.prices[t] || {};
       let r = rep[t] || 0;
@@ -1939,7 +2201,7 @@ function renderMarket() {
       let buy2Class = r >= 2 ? 'price-active' : 'price-dim';
       if (isLuxTown(t)) {
         let sellVal = p.sell && p.sell !== '-' ? LUX_ICON + esc(p.sell) : '-';
-        html += '<td colspan="2" style="text-align:center;color:var(--text2);">-</td><td style="color:var(--gold);">' + sellVal + '</td>';
+        html += '<td colspan="2" class="mk-none">-</td><td class="mk-lux">' + sellVal + '</td>';
       } else {
         html += '<td class="' + buyClass + '">' + esc(p.buy || '-') + '</td><td class="' + buy2Class + '">' + esc(p.buy2Rep || '-') + '</td><td>' + esc(p.sell || '-') + '</td>';
       }
@@ -1948,7 +2210,7 @@ function renderMarket() {
   });
 
   html += '</tbody></table></div>';
-  container.innerHTML = html;
+  return html;
 }
 
 function renderBuildings() {
@@ -1972,8 +2234,8 @@ function renderBuildings() {
     card += '<div class="card-title" style="flex-wrap:wrap;">' + esc(b.name);
 
     let mats = [];
-    Object.entries(b.wood).forEach(([m, qty]) => mats.push({ name: m, need: parseInt(qty) || 0 }));
-    Object.entries(b.ores).forEach(([m, qty]) => mats.push({ name: m, need: parseInt(qty) || 0 }));
+    for (const m in b.wood) mats.push({ name: m, need: parseInt(b.wood[m]) || 0 });
+    for (const m in b.ores) mats.push({ name: m, need: parseInt(b.ores[m]) || 0 });
 
     let allMet = mats.length > 0;
     mats.forEach(m => { if ((bldgRes[m.name] || 0) < m.need) allMet = false; });
@@ -1982,7 +2244,7 @@ function renderBuildings() {
       card += ' <span class="craft-badge">Can Craft</span>';
     }
 
-    card += '<button class="bldg-done-btn' + (isDone ? ' completed' : '') + '" onclick="toggleBuildingDone(\'' + escJs(b.name) + '\')">' + (isDone ? 'Completed' : 'Mark Done') + '</button>';
+    card += '<button class="bldg-done-btn' + (isDone ? ' completed' : '') + '" data-action="building-done" data-id="' + esc(b.name) + '">' + (isDone ? 'Completed' : 'Mark Done') + '</button>';
 
     if (b.itemRequired) {
       card += '</div><div class="card-subtitle">Requires: ' + esc(b.itemRequired) + '</div>';
@@ -1995,15 +2257,15 @@ function renderBuildings() {
       mats.forEach(m => {
         let owned = bldgRes[m.name] || 0;
         let cls = owned >= m.need ? 'mat-have' : 'mat-need';
-        card += '<a class="tag ' + cls + '" onclick="showDetail(\'material\',\'' + escJs(m.name) + '\')">' + esc(m.name) + ' ' + owned + '/' + m.need + '</a>';
+        card += '<a class="tag ' + cls + '" data-detail="material" data-id="' + esc(m.name) + '">' + esc(m.name) + ' ' + owned + '/' + m.need + '</a>';
       });
       card += '</div>';
     }
 
     if (mats.length) {
       card += '<div class="card-actions">';
-      card += '<button class="card-route-btn" onclick="event.stopPropagation();addToRouteAndGo(\'' + escJs(b.name) + '\')">Plan Route</button>';
-      card += '<button class="card-route-btn" onclick="event.stopPropagation();addToRoutePlanner(\'' + escJs(b.name) + '\')">+ Add to Route</button>';
+      card += '<button class="card-route-btn" data-action="route-go" data-id="' + esc(b.name) + '">Plan Route</button>';
+      card += '<button class="card-route-btn" data-action="route-add" data-id="' + esc(b.name) + '">+ Add to Route</button>';
       card += '</div>';
     }
 
@@ -2019,8 +2281,8 @@ function renderBuildings() {
   Object.entries(DATA.harvestLocations).forEach(([mat, locs]) => {
     const unlocked = canBuyResource(mat);
     const reqBuilding = WOOD_MATS.includes(mat) ? 'Lumbermill (Upgraded)' : 'Lapidary';
-    html += '<tr><td><a onclick="showDetail(\'material\',\'' + escJs(mat) + '\')">' + esc(mat) + '</a></td>';
-    html += '<td style="color:var(--green)">' + esc(locs) + '</td>';
+    html += '<tr><td><a data-detail="material" data-id="' + esc(mat) + '">' + esc(mat) + '</a></td>';
+    html += '<td class="loc-text">' + esc(locs) + '</td>';
     if (unlocked) {
       html += '<td style="color:var(--gold)">' + esc(DATA.resourceLuxCosts[mat] || '-') + '</td>';
       html += '<td style="color:var(--green);font-size:0.8rem;">Unlocked</td>';
@@ -2032,25 +2294,26 @@ function renderBuildings() {
   });
   html += '</table>';
 
-  container.innerHTML = html;
+  setHtmlNextFrame(container, html);
 }
 
+const STONE_COLORS = { 'Yellow': '#f0c040', 'Orange': '#ffa726', 'Blue': '#42a5f5', 'Green': '#66bb6a',
+  'Red': '#ef5350', 'Purple': '#ab47bc', 'White': '#e0e0e0', 'Any color': '#e0e0e0' };
+
 function renderStones() {
   const grid = document.getElementById('stones-grid');
-  const colorMap = { 'Yellow': '#f0c040', 'Orange': '#ffa726', 'Blue': '#42a5f5', 'Green': '#66bb6a',
-    'Red': '#ef5350', 'Purple': '#ab47bc', 'White': '#e0e0e0', 'Any color': '#e0e0e0' };
 
   grid.innerHTML = DATA.speakingStones.map(s => {
-    let clr = colorMap[s.color] || 'var(--text)';
+    let clr = STONE_COLORS[s.color] || 'var(--text)';
     let html = '<div class="card">';
-    html += '<div class="card-title"><a onclick="showDetail(\'stone\',\'' + escJs(s.name) + '\')" style="color:' + clr + '">' + esc(s.name) + '</a></div>';
+    html += '<div class="card-title"><a data-detail="stone" data-id="' + esc(s.name) + '" style="color:' + clr + '">' + esc(s.name) + '</a></div>';
     html += '<div class="card-subtitle">' + esc(s.element) + ' | ' + esc(s.color) + ' | x' + esc(s.available) + '</div>';
     html += '<div style="padding:6px;background:var(--bg);border-radius:4px;font-size:0.9rem;">' + esc(s.bonus) + '</div>';
     if (s.lapidaryExchange) {
       if (canBuyStones()) {
-        html += '<div style="font-size:0.82rem;color:var(--text2);margin-top:4px;">Exchange: ' + esc(s.lapidaryExchange) + '</div>';
+        html += '<div class="sub-note">Exchange: ' + esc(s.lapidaryExchange) + '</div>';
       } else {
-        html += '<div style="font-size:0.82rem;color:var(--text2);margin-top:4px;">Exchange: <span style="text-decoration:line-through;">' + esc(s.lapidaryExchange) + '</span> <span style="color:var(--red);font-size:0.78rem;">(Lapidary Upgraded)</span></div>';
+        html += '<div class="sub-note">Exchange: <span class="struck">' + esc(s.lapidaryExchange) + '</span> <span style="color:var(--red);font-size:0.78rem;">(Lapidary Upgraded)</span></div>';
       }
     }
 
@@ -2058,7 +2321,7 @@ function renderStones() {
     if (materialToCraft[s.name]) {
       html += '<div class="section-label">Used In</div><div class="tag-list">';
       materialToCraft[s.name].forEach(c => {
-        html += '<a class="tag craft" onclick="event.stopPropagation();showDetail(\'craft\',\'' + escJs(c.name) + '\')">' + esc(c.name) + '</a>';
+        html += '<a class="tag craft" data-detail="craft" data-id="' + esc(c.name) + '">' + esc(c.name) + '</a>';
       });
       html += '</div>';
     }
@@ -2072,7 +2335,7 @@ function renderMaterialIndex() {
   const container = document.getElementById('material-index');
   const mats = getAllMaterials();
   container.innerHTML = mats.map(m =>
-    '<a class="tag" onclick="showDetail(\'material\',\'' + escJs(m) + '\')" style="font-size:0.9rem;padding:6px 12px;">' + esc(m) + '</a>'
+    '<a class="tag" data-detail="material" data-id="' + esc(m) + '" style="font-size:0.9rem;padding:6px 12px;">' + esc(m) + '</a>'
   ).join('');
 }
 
@@ -2143,6 +2406,8 @@ function getResources() {
 
 function saveResources(res) {
   localStorage.setItem('tig_resources', JSON.stringify(res));
+  craftCardHtmlCache.clear();
+  detailHtmlCache.clear();
 }
 
 function renderResources() {
@@ -2170,9 +2435,9 @@ function renderResources() {
       html += '<div class="res-card">';
       html += '<div class="res-name">' + esc(mat) + '</div>';
       html += '<div class="res-controls">';
-      html += '<button class="res-qty-btn" onclick="adjustResource(\'' + escJs(mat) + '\',-1)">&#8722;</button>';
+      html += '<button class="res-qty-btn" data-action="res-dec" data-id="' + esc(mat) + '">&#8722;</button>';
       html += '<input type="number" class="res-qty-input" min="0" value="' + qty + '" data-mat="' + escJs(mat) + '" onchange="setResource(this)" />';
-      html += '<button class="res-qty-btn" onclick="adjustResource(\'' + escJs(mat) + '\',1)">+</button>';
+      html += '<button class="res-qty-btn" data-action="res-inc" data-id="' + esc(mat) + '">+</button>';
       html += '</div></div>';
     });
     html += '</div>';
@@ -2251,6 +2516,7 @@ function getCompletedBuildings() {
 
 function saveCompletedBuildings(arr) {
   localStorage.setItem('tig_buildings_done', JSON.stringify(arr));
+  detailHtmlCache.clear();
 }
 
 function getMarketRep() {
@@ -2264,6 +2530,7 @@ function getMarketRep() {
 
 function saveMarketRep(obj) {
   localStorage.setItem('tig_market_rep', JSON.stringify(obj));
+  detailHtmlCache.clear();
 }
 
 function getTownRep(town) {
@@ -2305,26 +2572,9 @@ function toggleBuildingDone(name) {
 let showCompletedBuildings = false;
 
 // --- Search ---
-function matchesSearch(enemy, q) {
-  q = q.toLowerCase();
-  if (enemy.name.toLowerCase().includes(q)) return true;
-  if (enemy.materialDrops.some(d => d.toLowerCase().includes(q))) return true;
-  if (enemy.itemDrop && enemy.itemDrop.toLowerCase().includes(q)) return true;
-  if (Object.values(enemy.locations).some(l => l.toLowerCase().includes(q))) return true;
-  return false;
-}
-
-function matchesSearchCraft(item, q) {
-  q = q.toLowerCase();
-  if (item.name.toLowerCase().includes(q)) return true;
-  if (item.city && item.city.toLowerCase().includes(q)) return true;
-  if (item.limitedTo && item.limitedTo.toLowerCase().includes(q)) return true;
-  if (item.type && item.type.toLowerCase().includes(q)) return true;
-  if (item.effect && item.effect.toLowerCase().includes(q)) return true;
-  if (item.prerequisite && item.prerequisite.toLowerCase().includes(q)) return true;
-  let allMats = [...Object.keys(item.materials || {}), ...Object.keys(item.wood || {}), ...Object.keys(item.ores || {})];
-  if (allMats.some(m => m.toLowerCase().includes(q))) return true;
-  return false;
+// q must already be lowercased
+function matchesSearch(entry, q) {
+  return searchText.get(entry).includes(q);
 }
 
 // --- Event wiring ---
@@ -2335,12 +2585,22 @@ let awRatingFilter = 'all';
 let accTypeFilter = 'all';
 let searchQuery = '';
 
+// Panels that don't follow the search or filters are built the first time
+// they are opened; buildings and stones re-render on every open anyway.
+const LAZY_PANELS = { market: renderMarket, materials: renderMaterialIndex };
+const renderedLazyPanels = new Set();
+
 function switchTab(tab) {
   currentTab = tab;
+  if (LAZY_PANELS[tab] && !renderedLazyPanels.has(tab)) {
+    renderedLazyPanels.add(tab);
+    LAZY_PANELS[tab]();
+  }
   document.querySelectorAll('.tab').forEach(t => t.classList.toggle('active', t.dataset.tab === tab));
   document.querySelectorAll('.panel').forEach(p => p.classList.toggle('active', p.id === 'panel-' + tab));
   const content = document.querySelector('.content');
   content.style.maxWidth = (tab === 'market' || tab === 'route-planner') ? 'none' : '';
+  clearTimeout(searchRefreshTimer);
   refreshCurrentTab();
   if (tab === 'resources') renderResources();
   if (tab === 'route-planner' && typeof rpInit === 'function') rpInit();
@@ -2500,10 +2760,37 @@ document.addEventListener('click', e => {
   }
 });
 
+// Buttons repeated on every card or resource row, and the route steps.
+// Each is called with the element's data-id and the element itself.
+const CLICK_ACTIONS = {
+  'route-go': addToRouteAndGo,
+  'route-add': addToRoutePlanner,
+  'building-done': toggleBuildingDone,
+  'res-dec': mat => adjustResource(mat, -1),
+  'res-inc': mat => adjustResource(mat, 1),
+  'route-zoom': nid => rpZoomToNode(nid),
+  'route-mat': (mat, el) => rpToggleMatDetail(el.dataset.step, mat, el.dataset.node),
+};
+
+// Links to a detail panel carry data-detail (type) and data-id instead of
+// an inline onclick, so one listener serves every card, tag and table row
+document.addEventListener('click', e => {
+  const btn = e.target.closest('[data-action]');
+  if (btn) { CLICK_ACTIONS[btn.dataset.action](btn.dataset.id, btn); return; }
+  const link = e.target.closest('[data-detail]');
+  if (link) showDetail(link.dataset.detail, link.dataset.id);
+});
+
+// The dropdown follows every keystroke; the tab itself re-renders once
+// typing pauses
+const SEARCH_REFRESH_DELAY = 120;
+let searchRefreshTimer = null;
+
 document.getElementById('globalSearch').addEventListener('input', e => {
   searchQuery = e.target.value.trim();
   updateSearchDropdown(searchQuery);
-  refreshCurrentTab();
+  clearTimeout(searchRefreshTimer);
+  searchRefreshTimer = setTimeout(refreshCurrentTab, SEARCH_REFRESH_DELAY);
 });
 
 document.getElementById('close-detail').addEventListener('click', () => {
@@ -2529,7 +2816,28 @@ const RP = {
   // Graph (loaded from DATA or localStorage)
   graph: null,
   adj: {},          // adjacency list: nodeId -> [nodeId, ...]
-  distMatrix: null, // lazy-computed BFS distance matrix
+  nodeIdx: null,    // nodeId -> dense index
+  nodeIds: null,    // dense index -> nodeId
+  adjStart: null,   // CSR: neighbours of node i are adjList[adjStart[i]..adjStart[i+1])
+  adjList: null,
+  distRows: null,   // distRows[i]: Uint16Array of hop counts from node i, filled on first use
+  // BFS scratch buffers sized to the graph; contents only valid until the next BFS
+  bfsQueue: null, bfsPrev: null,
+  // Draw lists, rebuilt with the adjacency (node objects are shared with
+  // RP.graph, so dragged positions show up without a rebuild)
+  nodeList: [],     // [nodeId, node] pairs
+  landEdges: [],    // [node, node] pairs
+  waterEdges: [],
+  edgePaths: null,  // { land, water } Path2D, rebuilt lazily after edits/drags
+  nodeXY: null,     // Float32Array of x, y per nodeList entry, same lifetime
+  routeArrows: null, // [midX, midY, cos, sin] per route segment, same lifetime
+  routeArrowsFor: null, // the RP.route they were built for
+  boatOk: false,    // Boat Dock built when the adjacency was last built
+  matSourceCache: new Map(), // source mode|chapter|material -> source node ids
+  matNodeEnemies: null, // material -> Map of node id -> [{ enemy, chapters }], rebuilt lazily
+  routeCache: new Map(),     // source mode|chapter|start|items -> rpComputeRouteMulti result
+  stepViews: new Map(),      // route stop node id -> its result row elements (rpStepView)
+  waterNodes: new Set(), // ids of nodes with at least one water edge
   // Route result
   route: null,
   // Editor state
@@ -2539,6 +2847,12 @@ const RP = {
   // Mouse state
   mouseX: 0, mouseY: 0, isPanning: false, panStartX: 0, panStartY: 0,
   hoverNode: null,
+  drawPending: false,
+  // Cached layout for the mouse handlers, refreshed by rpUpdateRects
+  canvasRect: null, areaRect: null,
+  tooltipEl: null, tooltipNode: null, // node whose info the tooltip holds
+  dom: null, // static route planner elements, looked up once at startup
+  modalResolve: null, // settles the open editor dialog
 };
 
 function rpValidateGraph(g) {
@@ -2568,7 +2882,9 @@ function rpInit() {
       if (rpValidateGraph(parsed)) RP.graph = parsed;
     } catch(e) { RP.graph = null; }
   }
-  if (!RP.graph) RP.graph = JSON.parse(JSON.stringify(DATA.mapGraph));
+  // The built-in graph is used as is (DATA is frozen) until the editor
+  // needs a copy it can change
+  if (!RP.graph) RP.graph = DATA.mapGraph;
   rpBuildAdj();
   // Load map image
   RP.mapImg = new Image();
@@ -2593,9 +2909,15 @@ const WATER_ONLY_NODES = new Set(['82', '50', '42', '27', '39', '47', '66', '65'
 function rpBuildAdj() {
   RP.adj = {};
   rpInvalidateSpecialAreaCache();
+  RP.matSourceCache.clear();
+  RP.matNodeEnemies = null;
+  RP.routeCache.clear();
+  RP.stepViews.clear();
   const nodes = RP.graph.nodes;
   const boatOk = rpIsBoatDockBuilt();
+  RP.boatOk = boatOk;
   for (const nid in nodes) RP.adj[nid] = [];
+  const seen = new Set(); // "a|b" with a < b, so [a, b] and [b, a] count once
 
   RP.graph.edges.forEach(e => {
     const [a, b] = e;
@@ -2617,49 +2939,144 @@ function rpBuildAdj() {
       if (!aOnWater || !bOnWater) return;
     }
 
-    if (!RP.adj[a]) RP.adj[a] = [];
-    if (!RP.adj[b]) RP.adj[b] = [];
-    if (!RP.adj[a].includes(b)) RP.adj[a].push(b);
-    if (!RP.adj[b].includes(a)) RP.adj[b].push(a);
+    const key = a < b ? a + '|' + b : b + '|' + a;
+    if (seen.has(key)) return;
+    seen.add(key);
+    RP.adj[a].push(b);
+    if (a !== b) RP.adj[b].push(a);
   });
-  RP.distMatrix = null; // invalidate cache
+
+  const ids = Object.keys(RP.adj);
+  const n = ids.length;
+  RP.nodeIds = ids;
+  RP.nodeIdx = new Map();
+  ids.forEach((nid, i) => RP.nodeIdx.set(nid, i));
+  RP.adjStart = new Int32Array(n + 1);
+  for (let i = 0; i < n; i++) RP.adjStart[i + 1] = RP.adjStart[i] + RP.adj[ids[i]].length;
+  RP.adjList = new Int32Array(RP.adjStart[n]);
+  for (let i = 0; i < n; i++) {
+    let p = RP.adjStart[i];
+    for (const v of RP.adj[ids[i]]) RP.adjList[p++] = RP.nodeIdx.get(v);
+  }
+  RP.distRows = new Array(n).fill(null); // invalidate cache
+  RP.bfsQueue = new Int32Array(n);
+  RP.bfsPrev = new Int32Array(n);
+  rpRebuildDrawCache();
 }
 
-function rpBFS(start) {
-  const dist = {}; dist[start] = 0;
-  const queue = [start]; let qi = 0;
-  while (qi < queue.length) {
-    const u = queue[qi++];
-    (RP.adj[u] || []).forEach(v => {
-      if (dist[v] === undefined) { dist[v] = dist[u] + 1; queue.push(v); }
-    });
+function rpRebuildDrawCache() {
+  const nodes = RP.graph.nodes;
+  RP.nodeList = Object.entries(nodes);
+  RP.landEdges = [];
+  RP.waterEdges = [];
+  RP.waterNodes = new Set();
+  RP.graph.edges.forEach(e => {
+    const isWater = e[2] === 'water';
+    if (isWater) { RP.waterNodes.add(e[0]); RP.waterNodes.add(e[1]); }
+    if (!nodes[e[0]] || !nodes[e[1]]) return;
+    (isWater ? RP.waterEdges : RP.landEdges).push([nodes[e[0]], nodes[e[1]]]);
+  });
+  RP.edgePaths = null;
+  RP.nodeXY = null;
+  RP.routeArrows = null;
+  RP.tooltipNode = null;
+}
+
+// Arrow pointing along +x, one unit long
+let rpArrow = null;
+function rpArrowPath() {
+  if (!rpArrow) {
+    rpArrow = new Path2D();
+    rpArrow.moveTo(1, 0);
+    rpArrow.lineTo(-0.5, -0.5);
+    rpArrow.lineTo(-0.5, 0.5);
+    rpArrow.closePath();
+  }
+  return rpArrow;
+}
+
+// Midpoint and direction of each segment of the current route's path
+function rpRouteArrows() {
+  if (!RP.routeArrows || RP.routeArrowsFor !== RP.route) {
+    const nodes = RP.graph.nodes, path = RP.route.fullPath;
+    RP.routeArrows = [];
+    RP.routeArrowsFor = RP.route;
+    for (let i = 1; i < path.length; i++) {
+      const prev = nodes[path[i - 1]], curr = nodes[path[i]];
+      if (!prev || !curr) continue;
+      const angle = Math.atan2(curr.y - prev.y, curr.x - prev.x);
+      RP.routeArrows.push([(prev.x + curr.x) / 2, (prev.y + curr.y) / 2, Math.cos(angle), Math.sin(angle)]);
+    }
   }
+  return RP.routeArrows;
+}
+
+// Land and water edges as one path each, in map coordinates
+function rpEdgePaths() {
+  if (!RP.edgePaths) {
+    const land = new Path2D(), water = new Path2D();
+    for (const [a, b] of RP.landEdges) { land.moveTo(a.x, a.y); land.lineTo(b.x, b.y); }
+    for (const [a, b] of RP.waterEdges) { water.moveTo(a.x, a.y); water.lineTo(b.x, b.y); }
+    RP.edgePaths = { land, water };
+  }
+  return RP.edgePaths;
+}
+
+const RP_NO_PATH = 0xFFFF;
+
+// Hop counts from one node to every other, unreachable nodes left at
+// RP_NO_PATH. Rows are only built for nodes a route actually measures from
+// (the start and candidate sources), so large graphs never pay for N x N.
+function rpBFSFrom(s) {
+  const start = RP.adjStart, list = RP.adjList;
+  const n = RP.nodeIds.length;
+  const dist = new Uint16Array(n).fill(RP_NO_PATH);
+  const queue = RP.bfsQueue;
+  let head = 0, tail = 0;
+  queue[tail++] = s;
+  dist[s] = 0;
+  while (head < tail) {
+    const u = queue[head++];
+    const du = dist[u] + 1;
+    for (let p = start[u], end = start[u + 1]; p < end; p++) {
+      const v = list[p];
+      if (dist[v] === RP_NO_PATH) { dist[v] = du; queue[tail++] = v; }
+    }
+  }
+  RP.distRows[s] = dist;
   return dist;
 }
 
-function rpGetDist(a, b) {
-  if (!RP.distMatrix) RP.distMatrix = {};
-  if (!RP.distMatrix[a]) RP.distMatrix[a] = rpBFS(a);
-  const d = RP.distMatrix[a][b];
-  return d === undefined ? Infinity : d;
+// Hop count between two nodes by dense index
+function rpDistIdx(i, j) {
+  const d = (RP.distRows[i] || rpBFSFrom(i))[j];
+  return d === RP_NO_PATH ? Infinity : d;
 }
 
 function rpBFSPath(start, end) {
   if (start === end) return [start];
-  const prev = {}; prev[start] = null;
-  const queue = [start]; let qi = 0;
-  while (qi < queue.length) {
-    const u = queue[qi++];
-    for (const v of (RP.adj[u] || [])) {
-      if (prev[v] === undefined) {
+  const s = RP.nodeIdx.get(start), t = RP.nodeIdx.get(end);
+  if (s === undefined || t === undefined) return null;
+  const adjStart = RP.adjStart, adjList = RP.adjList;
+  const prev = RP.bfsPrev.fill(-1);
+  const queue = RP.bfsQueue;
+  let head = 0, tail = 0;
+  queue[tail++] = s;
+  prev[s] = s;
+  while (head < tail) {
+    const u = queue[head++];
+    for (let p = adjStart[u], pend = adjStart[u + 1]; p < pend; p++) {
+      const v = adjList[p];
+      if (prev[v] < 0) {
         prev[v] = u;
-        if (v === end) {
+        if (v === t) {
           const path = [];
-          let c = end;
-          while (c !== null) { path.unshift(c); c = prev[c]; }
-          return path;
+          let c = t;
+          while (c !== s) { path.push(RP.nodeIds[c]); c = prev[c]; }
+          path.push(start);
+          return path.reverse();
         }
-        queue.push(v);
+        queue[tail++] = v;
       }
     }
   }
@@ -2668,15 +3085,26 @@ function rpBFSPath(start, end) {
 
 // --- Material Source Resolution ---
 function rpGetMaterialSources(materialName, chapter) {
+  const key = rpSourceMode + '|' + chapter + '|' + materialName;
+  let sources = RP.matSourceCache.get(key);
+  if (!sources) {
+    sources = rpFindMaterialSources(materialName, chapter);
+    RP.matSourceCache.set(key, sources);
+  }
+  return sources;
+}
+
+function rpFindMaterialSources(materialName, chapter) {
   const sources = [];
   const ch = String(chapter);
+  const locKey = 'Chapter ' + ch;
   const nodes = RP.graph.nodes;
   // Enemy drops: find enemies that drop this material at nodes available in the selected chapter
   if (materialToEnemies[materialName]) {
     const seen = new Set();
     materialToEnemies[materialName].forEach(enemy => {
       // Only check the exact selected chapter (enemies may not persist across chapters)
-      const locStr = enemy.locations['Chapter ' + ch];
+      const locStr = enemy.locations[locKey];
       if (locStr) {
         locStr.split(',').forEach(part => {
           let p = part.trim().replace(/\.$/, '');
@@ -2703,10 +3131,8 @@ function rpGetMaterialSources(materialName, chapter) {
     });
   }
   // Harvest nodes (always included)
-  if (DATA.harvestLocations[materialName]) {
-    const locStr = String(DATA.harvestLocations[materialName]);
-    locStr.split(',').forEach(part => {
-      const p = part.trim();
+  if (harvestLocationParts.has(materialName)) {
+    harvestLocationParts.get(materialName).forEach(p => {
       const num = parseInt(p);
       if (!isNaN(num) && nodes[String(num)]) {
         sources.push(String(num));
@@ -2731,6 +3157,42 @@ function rpGetMaterialSources(materialName, chapter) {
   return [...new Set(sources)];
 }
 
+// Material -> node id -> enemies dropping it there, each with the chapters
+// ("Ch2") it appears in. Location parts resolve to a node by exact id or
+// special area name.
+function rpGetMatNodeEnemies() {
+  if (!RP.matNodeEnemies) {
+    const index = new Map();
+    DATA.enemies.forEach(enemy => {
+      const chaptersAt = new Map();
+      for (const [ch, locStr] of Object.entries(enemy.locations)) {
+        const label = ch.replace('Chapter ', 'Ch');
+        const here = new Set();
+        locStr.split(',').forEach(part => {
+          const p = part.trim().replace(/\.$/, '');
+          if (RP.graph.nodes[p]) here.add(p);
+          const saId = rpSpecialAreaId(p);
+          if (saId) here.add(saId);
+        });
+        here.forEach(nid => {
+          if (!chaptersAt.has(nid)) chaptersAt.set(nid, []);
+          chaptersAt.get(nid).push(label);
+        });
+      }
+      dropMaterialNames.get(enemy).forEach(mat => {
+        if (!index.has(mat)) index.set(mat, new Map());
+        const byNode = index.get(mat);
+        for (const [nid, chapters] of chaptersAt) {
+          if (!byNode.has(nid)) byNode.set(nid, []);
+          byNode.get(nid).push({ enemy, chapters });
+        }
+      });
+    });
+    RP.matNodeEnemies = index;
+  }
+  return RP.matNodeEnemies;
+}
+
 let _specialAreaCache = null;
 function _buildSpecialAreaCache() {
   _specialAreaCache = {};
@@ -2755,134 +3217,40 @@ function rpSpecialAreaId(name) {
 }
 function rpInvalidateSpecialAreaCache() { _specialAreaCache = null; }
 
+// Town name fragment -> town node ID, first match wins
+const TOWN_PATTERNS = [
+  ['Mir', 'mir'], ['Razdor', 'razdor'], ['Ryba', 'ryba'], ['Silny', 'silny'],
+  ['Strofa', 'strofa'], ['Vouno', 'vouno'],
+  ['Fort Istra Apothecary', 'fort_istra'], ['Fort Istra', 'fort_istra'],
+];
+const townIdCache = new Map();
+
 function rpTownId(townName) {
-  const map = {
-    'Mir': 'mir', 'Razdor': 'razdor', 'Ryba': 'ryba', 'Silny': 'silny',
-    'Strofa': 'strofa', 'Vouno': 'vouno',
-    'Fort Istra Apothecary': 'fort_istra', 'Fort Istra': 'fort_istra',
-  };
-  for (const [k, v] of Object.entries(map)) {
-    if (townName.includes(k)) return v;
+  let id = townIdCache.get(townName);
+  if (id === undefined) {
+    id = null;
+    for (const [k, v] of TOWN_PATTERNS) {
+      if (townName.includes(k)) { id = v; break; }
+    }
+    townIdCache.set(townName, id);
   }
-  return null;
+  return id;
 }
 
 // --- Multi-Stop Route Optimization ---
 function rpComputeRoute(itemName, startNode, chapter) {
   // Determine required materials
-  let item = DATA.armorWeapons.find(i => i.name === itemName);
-  if (!item) item = DATA.accessories.find(i => i.name === itemName);
-  if (!item) item = DATA.buildings.find(i => i.name === itemName);
+  const item = routeItemByName.get(itemName);
   if (!item) return null;
 
   const materialsNeeded = [];
   [item.materials, item.wood, item.ores].forEach(group => {
-    Object.entries(group || {}).forEach(([mat, info]) => {
+    Object.entries(group).forEach(([mat, info]) => {
       materialsNeeded.push({ name: mat, qty: info.qty || info });
     });
   });
   if (!materialsNeeded.length) return null;
-
-  // For each material, find source nodes accessible in this chapter
-  const matSources = {};
-  materialsNeeded.forEach(m => {
-    matSources[m.name] = rpGetMaterialSources(m.name, chapter);
-  });
-
-  // Check if all materials have at least one source
-  const unreachable = materialsNeeded.filter(m => !matSources[m.name].length);
-  if (unreachable.length) {
-    let details = unreachable.map(m => {
-      let hint = m.name;
-      if (DATA.harvestLocations[m.name]) {
-        let loc = String(DATA.harvestLocations[m.name]);
-        let expected = loc.replace(/^Ice Caves:\s*/i, 'IC - ').replace(/^Frozen Wastes:\s*/i, 'FW - ');
-        hint += ' (add node "' + expected + '" to map)';
-      }
-      return hint;
-    }).join(', ');
-    return { error: 'No accessible sources for: ' + details };
-  }
-
-  // Greedy nearest-unvisited-source heuristic
-  let current = startNode;
-  const collected = new Set();
-  const stops = []; // { nodeId, materials: [...], dist }
-
-  while (collected.size < materialsNeeded.length) {
-    let bestNode = null, bestDist = Infinity, bestMats = [];
-    materialsNeeded.forEach(m => {
-      if (collected.has(m.name)) return;
-      matSources[m.name].forEach(nid => {
-        const d = rpGetDist(current, nid);
-        if (d < bestDist) {
-          bestDist = d;
-          bestNode = nid;
-          bestMats = [m.name];
-        } else if (d === bestDist && nid === bestNode) {
-          bestMats.push(m.name);
-        }
-      });
-    });
-    if (!bestNode || bestDist === Infinity) {
-      return { error: 'Cannot reach all material sources from ' + current };
-    }
-    // Check if this node provides other uncollected materials too
-    const allMatsHere = [];
-    materialsNeeded.forEach(m => {
-      if (!collected.has(m.name) && matSources[m.name].includes(bestNode)) {
-        allMatsHere.push(m.name);
-      }
-    });
-    allMatsHere.forEach(mn => collected.add(mn));
-    stops.push({ nodeId: bestNode, materials: allMatsHere, distFromPrev: bestDist });
-    current = bestNode;
-  }
-
-  // 2-opt improvement
-  for (let improved = true; improved;) {
-    improved = false;
-    for (let i = 0; i < stops.length - 1; i++) {
-      for (let j = i + 1; j < stops.length; j++) {
-        // Compute current cost of segment i..j
-        const before = i === 0 ? startNode : stops[i - 1].nodeId;
-        let oldCost = rpGetDist(before, stops[i].nodeId);
-        for (let k = i; k < j; k++) oldCost += rpGetDist(stops[k].nodeId, stops[k + 1].nodeId);
-        // Compute cost if we reverse i..j
-        const rev = stops.slice(i, j + 1).reverse();
-        let newCost = rpGetDist(before, rev[0].nodeId);
-        for (let k = 0; k < rev.length - 1; k++) newCost += rpGetDist(rev[k].nodeId, rev[k + 1].nodeId);
-        if (j + 1 < stops.length) {
-          oldCost += rpGetDist(stops[j].nodeId, stops[j + 1].nodeId);
-          newCost += rpGetDist(rev[rev.length - 1].nodeId, stops[j + 1].nodeId);
-        }
-        if (newCost < oldCost) {
-          for (let k = 0; k < rev.length; k++) stops[i + k] = rev[k];
-          improved = true;
-        }
-      }
-    }
-  }
-
-  // Recalculate distances after optimization
-  let prev = startNode;
-  let totalDist = 0;
-  stops.forEach(s => {
-    s.distFromPrev = rpGetDist(prev, s.nodeId);
-    totalDist += s.distFromPrev;
-    prev = s.nodeId;
-  });
-
-  // Build full path for drawing
-  const fullPath = [];
-  prev = startNode;
-  stops.forEach(s => {
-    const seg = rpBFSPath(prev, s.nodeId);
-    if (seg) { if (fullPath.length) seg.shift(); fullPath.push(...seg); }
-    prev = s.nodeId;
-  });
-
-  return { stops, totalDist, fullPath, startNode, materialsNeeded };
+  return rpRouteForMaterials(materialsNeeded, startNode, chapter);
 }
 
 function rpComputeRouteMulti(itemNames, startNode, chapter) {
@@ -2890,12 +3258,10 @@ function rpComputeRouteMulti(itemNames, startNode, chapter) {
   const materialMap = {}; // name -> total qty needed
   let foundAny = false;
   itemNames.forEach(itemName => {
-    let item = DATA.armorWeapons.find(i => i.name === itemName);
-    if (!item) item = DATA.accessories.find(i => i.name === itemName);
-    if (!item) item = DATA.buildings.find(i => i.name === itemName);
+    const item = routeItemByName.get(itemName);
     if (!item) return;
     [item.materials, item.wood, item.ores].forEach(group => {
-      Object.entries(group || {}).forEach(([mat, info]) => {
+      Object.entries(group).forEach(([mat, info]) => {
         foundAny = true;
         const qty = parseInt(info.qty || info) || 0;
         materialMap[mat] = (materialMap[mat] || 0) + qty;
@@ -2905,15 +3271,28 @@ function rpComputeRouteMulti(itemNames, startNode, chapter) {
   if (!foundAny) return null;
 
   const materialsNeeded = Object.entries(materialMap).map(([name, qty]) => ({ name, qty }));
+  return rpRouteForMaterials(materialsNeeded, startNode, chapter);
+}
 
+// Plan stops that collect every material in materialsNeeded. Works on dense
+// node indices (see rpBuildAdj) and material indices throughout; node IDs
+// only come back in the returned stops and path.
+function rpRouteForMaterials(materialsNeeded, startNode, chapter) {
   // For each material, find source nodes accessible in this chapter
-  const matSources = {};
-  materialsNeeded.forEach(m => {
-    matSources[m.name] = rpGetMaterialSources(m.name, chapter);
+  const matIdx = new Map(); // material name -> index of its first entry
+  materialsNeeded.forEach((m, i) => { if (!matIdx.has(m.name)) matIdx.set(m.name, i); });
+  const matSources = materialsNeeded.map(m => rpGetMaterialSources(m.name, chapter).map(nid => RP.nodeIdx.get(nid)));
+  // Node -> indices of the materials it supplies, in materialsNeeded order
+  const nodeToMats = new Map();
+  materialsNeeded.forEach((m, mi) => {
+    for (const n of matSources[mi]) {
+      if (!nodeToMats.has(n)) nodeToMats.set(n, []);
+      nodeToMats.get(n).push(mi);
+    }
   });
 
   // Check if all materials have at least one source
-  const unreachable = materialsNeeded.filter(m => !matSources[m.name].length);
+  const unreachable = materialsNeeded.filter((m, mi) => !matSources[mi].length);
   if (unreachable.length) {
     let details = unreachable.map(m => {
       let hint = m.name;
@@ -2927,37 +3306,45 @@ function rpComputeRouteMulti(itemNames, startNode, chapter) {
     return { error: 'No accessible sources for: ' + details };
   }
 
+  const start = RP.nodeIdx.get(startNode);
+  if (start === undefined) return { error: 'Cannot reach all material sources from ' + startNode };
+
   // Greedy nearest-unvisited-source heuristic
-  let current = startNode;
-  const collected = new Set();
-  const stops = [];
-
-  while (collected.size < materialsNeeded.length) {
-    let bestNode = null, bestDist = Infinity, bestMats = [];
-    materialsNeeded.forEach(m => {
-      if (collected.has(m.name)) return;
-      matSources[m.name].forEach(nid => {
-        const d = rpGetDist(current, nid);
+  let current = start;
+  const collected = new Uint8Array(materialsNeeded.length); // by matIdx
+  let collectedCount = 0;
+  const stops = []; // { node, materials: [...] }
+
+  while (collectedCount < materialsNeeded.length) {
+    let bestNode = -1, bestDist = Infinity;
+    // A source at the current node can't be beaten, and later candidates
+    // only win on a strictly shorter distance
+    for (let mi = 0; mi < materialsNeeded.length && bestDist > 0; mi++) {
+      if (collected[matIdx.get(materialsNeeded[mi].name)]) continue;
+      for (const n of matSources[mi]) {
+        const d = rpDistIdx(current, n);
         if (d < bestDist) {
-          bestDist = d;
-          bestNode = nid;
-          bestMats = [m.name];
-        } else if (d === bestDist && nid === bestNode) {
-          bestMats.push(m.name);
+          bestDist = d; bestNode = n;
+          if (d === 0) break;
         }
-      });
-    });
-    if (!bestNode || bestDist === Infinity) {
-      return { error: 'Cannot reach all material sources from ' + current };
+      }
+    }
+    if (bestNode < 0 || bestDist === Infinity) {
+      return { error: 'Cannot reach all material sources from ' + RP.nodeIds[current] };
     }
+    // Collect everything else this node provides too
     const allMatsHere = [];
-    materialsNeeded.forEach(m => {
-      if (!collected.has(m.name) && matSources[m.name].includes(bestNode)) {
-        allMatsHere.push(m.name);
-      }
-    });
-    allMatsHere.forEach(mn => collected.add(mn));
-    stops.push({ nodeId: bestNode, materials: allMatsHere, distFromPrev: bestDist });
+    for (const mi of nodeToMats.get(bestNode)) {
+      const name = materialsNeeded[mi].name;
+      const ci = matIdx.get(name);
+      if (collected[ci]) continue;
+      allMatsHere.push(name);
+    }
+    for (const name of allMatsHere) {
+      const ci = matIdx.get(name);
+      if (!collected[ci]) { collected[ci] = 1; collectedCount++; }
+    }
+    stops.push({ node: bestNode, materials: allMatsHere });
     current = bestNode;
   }
 
@@ -2966,55 +3353,64 @@ function rpComputeRouteMulti(itemNames, startNode, chapter) {
     improved = false;
     for (let i = 0; i < stops.length - 1; i++) {
       for (let j = i + 1; j < stops.length; j++) {
-        const before = i === 0 ? startNode : stops[i - 1].nodeId;
-        let oldCost = rpGetDist(before, stops[i].nodeId);
-        for (let k = i; k < j; k++) oldCost += rpGetDist(stops[k].nodeId, stops[k + 1].nodeId);
-        const rev = stops.slice(i, j + 1).reverse();
-        let newCost = rpGetDist(before, rev[0].nodeId);
-        for (let k = 0; k < rev.length - 1; k++) newCost += rpGetDist(rev[k].nodeId, rev[k + 1].nodeId);
+        // Reversing i..j keeps the inner hops (distances are symmetric),
+        // so only the two boundary hops change
+        const before = i === 0 ? start : stops[i - 1].node;
+        let oldCost = rpDistIdx(before, stops[i].node);
+        let newCost = rpDistIdx(before, stops[j].node);
         if (j + 1 < stops.length) {
-          oldCost += rpGetDist(stops[j].nodeId, stops[j + 1].nodeId);
-          newCost += rpGetDist(rev[rev.length - 1].nodeId, stops[j + 1].nodeId);
+          const after = stops[j + 1].node;
+          oldCost += rpDistIdx(stops[j].node, after);
+          newCost += rpDistIdx(stops[i].node, after);
         }
         if (newCost < oldCost) {
-          for (let k = 0; k < rev.length; k++) stops[i + k] = rev[k];
+          for (let a = i, b = j; a < b; a++, b--) [stops[a], stops[b]] = [stops[b], stops[a]];
           improved = true;
         }
       }
     }
   }
 
-  // Recalculate distances after optimization
-  let prev = startNode;
+  // Distances after optimization, and the stops as node IDs
+  let prev = start;
   let totalDist = 0;
-  stops.forEach(s => {
-    s.distFromPrev = rpGetDist(prev, s.nodeId);
-    totalDist += s.distFromPrev;
-    prev = s.nodeId;
+  const routeStops = stops.map(s => {
+    const distFromPrev = rpDistIdx(prev, s.node);
+    totalDist += distFromPrev;
+    prev = s.node;
+    return { nodeId: RP.nodeIds[s.node], materials: s.materials, distFromPrev };
   });
 
   // Build full path for drawing
   const fullPath = [];
-  prev = startNode;
-  stops.forEach(s => {
-    const seg = rpBFSPath(prev, s.nodeId);
+  let prevId = startNode;
+  routeStops.forEach(s => {
+    const seg = rpBFSPath(prevId, s.nodeId);
     if (seg) { if (fullPath.length) seg.shift(); fullPath.push(...seg); }
-    prev = s.nodeId;
+    prevId = s.nodeId;
   });
 
-  return { stops, totalDist, fullPath, startNode, materialsNeeded };
+  return { stops: routeStops, totalDist, fullPath, startNode, materialsNeeded };
 }
 
 // --- Canvas Rendering ---
 function rpResize() {
-  const area = document.getElementById('rp-map-area');
+  const area = RP.dom.mapArea;
   if (!area) return;
   RP.canvas.width = area.clientWidth;
   RP.canvas.height = area.clientHeight;
+  rpUpdateRects();
   if (!RP.mapLoaded) rpFitView();
   rpDraw();
 }
 
+// Mouse handlers convert client coordinates with these rects instead of
+// forcing a layout read on every mousemove
+function rpUpdateRects() {
+  RP.canvasRect = RP.canvas.getBoundingClientRect();
+  RP.areaRect = RP.dom.mapArea.getBoundingClientRect();
+}
+
 function rpFitView() {
   if (!RP.canvas) return;
   const cw = RP.canvas.width || 800, ch = RP.canvas.height || 600;
@@ -3055,33 +3451,19 @@ function rpDraw() {
   const r = Math.max(8, 12 / Math.sqrt(RP.zoom));
 
   // Draw edges
-  const boatOk = rpIsBoatDockBuilt();
+  const edgePaths = rpEdgePaths();
   // Land edges first
   ctx.strokeStyle = 'rgba(255,255,255,0.6)';
   ctx.lineWidth = 4 / RP.zoom;
-  RP.graph.edges.forEach(e => {
-    if (e[2] === 'water') return;
-    if (!nodes[e[0]] || !nodes[e[1]]) return;
-    ctx.beginPath();
-    ctx.moveTo(nodes[e[0]].x, nodes[e[0]].y);
-    ctx.lineTo(nodes[e[1]].x, nodes[e[1]].y);
-    ctx.stroke();
-  });
+  ctx.stroke(edgePaths.land);
   // Water edges
-  RP.graph.edges.forEach(e => {
-    if (e[2] !== 'water') return;
-    if (!nodes[e[0]] || !nodes[e[1]]) return;
-    ctx.save();
-    ctx.strokeStyle = boatOk ? 'rgba(30,90,160,0.9)' : 'rgba(30,90,160,0.35)';
-    ctx.lineWidth = 4 / RP.zoom;
-    ctx.setLineDash([12 / RP.zoom, 8 / RP.zoom]);
-    ctx.beginPath();
-    ctx.moveTo(nodes[e[0]].x, nodes[e[0]].y);
-    ctx.lineTo(nodes[e[1]].x, nodes[e[1]].y);
-    ctx.stroke();
-    ctx.setLineDash([]);
-    ctx.restore();
-  });
+  ctx.save();
+  ctx.strokeStyle = RP.boatOk ? 'rgba(30,90,160,0.9)' : 'rgba(30,90,160,0.35)';
+  ctx.lineWidth = 4 / RP.zoom;
+  ctx.setLineDash([12 / RP.zoom, 8 / RP.zoom]);
+  ctx.stroke(edgePaths.water);
+  ctx.setLineDash([]);
+  ctx.restore();
 
   // Draw connect-mode preview line (dashed line from edgeStart to cursor)
   if (RP.connectMode && RP.edgeStart && nodes[RP.edgeStart]) {
@@ -3113,36 +3495,20 @@ function rpDraw() {
     });
     ctx.stroke();
 
-    // Draw direction arrows along path
+    // Draw direction arrows along path: each is the unit arrow placed
+    // straight into screen space (10px long at any zoom)
     ctx.fillStyle = '#e94560';
-    for (let i = 1; i < RP.route.fullPath.length; i++) {
-      const prev = nodes[RP.route.fullPath[i - 1]];
-      const curr = nodes[RP.route.fullPath[i]];
-      if (!prev || !curr) continue;
-      const mx = (prev.x + curr.x) / 2, my = (prev.y + curr.y) / 2;
-      const angle = Math.atan2(curr.y - prev.y, curr.x - prev.x);
-      const sz = 10 / RP.zoom;
-      ctx.save();
-      ctx.translate(mx, my);
-      ctx.rotate(angle);
-      ctx.beginPath();
-      ctx.moveTo(sz, 0);
-      ctx.lineTo(-sz / 2, -sz / 2);
-      ctx.lineTo(-sz / 2, sz / 2);
-      ctx.closePath();
-      ctx.fill();
-      ctx.restore();
+    const arrow = rpArrowPath();
+    for (const [mx, my, cos, sin] of rpRouteArrows()) {
+      ctx.setTransform(cos * 10, sin * 10, -sin * 10, cos * 10, mx * RP.zoom + RP.viewX, my * RP.zoom + RP.viewY);
+      ctx.fill(arrow);
     }
+    ctx.setTransform(RP.zoom, 0, 0, RP.zoom, RP.viewX, RP.viewY);
   }
 
-  // Build set of water nodes (nodes with at least one water edge)
-  const waterNodes = new Set();
-  RP.graph.edges.forEach(e => {
-    if (e[2] === 'water') { waterNodes.add(e[0]); waterNodes.add(e[1]); }
-  });
-
   // Draw nodes
-  for (const [nid, n] of Object.entries(nodes)) {
+  const waterNodes = RP.waterNodes;
+  for (const [nid, n] of RP.nodeList) {
     let color = waterNodes.has(nid) ? '#42a5f5' : '#66bb6a'; // water: blue, regular: green
     if (n.type === 'town') color = '#f0c040';
     else if (n.type === 'special') color = '#ab47bc';
@@ -3199,25 +3565,43 @@ function rpDraw() {
   ctx.restore();
 }
 
+// Coalesce redraws from input events into one per animation frame
+function rpScheduleDraw() {
+  if (RP.drawPending) return;
+  RP.drawPending = true;
+  requestAnimationFrame(() => { RP.drawPending = false; rpDraw(); });
+}
+
 function rpNodeAtScreen(sx, sy) {
   const [mx, my] = rpScreenToMap(sx, sy);
   const hitR = Math.max(15, 20 / RP.zoom);
-  let closest = null, closestDist = Infinity;
-  for (const [nid, n] of Object.entries(RP.graph.nodes)) {
-    const d = Math.hypot(n.x - mx, n.y - my);
-    if (d < hitR && d < closestDist) { closest = nid; closestDist = d; }
+  if (!RP.nodeXY) {
+    RP.nodeXY = new Float32Array(RP.nodeList.length * 2);
+    RP.nodeList.forEach(([, n], i) => { RP.nodeXY[2 * i] = n.x; RP.nodeXY[2 * i + 1] = n.y; });
   }
-  return closest;
+  const xy = RP.nodeXY;
+  let best = -1, bestD2 = hitR * hitR;
+  for (let i = 0; i < xy.length; i += 2) {
+    const dx = xy[i] - mx, dy = xy[i + 1] - my;
+    const d2 = dx * dx + dy * dy;
+    if (d2 < bestD2) { bestD2 = d2; best = i >> 1; }
+  }
+  return best < 0 ? null : RP.nodeList[best][0];
 }
 
 // --- Event Binding ---
 function rpBindEvents() {
   const canvas = RP.canvas;
-  const area = document.getElementById('rp-map-area');
-  const tooltip = document.getElementById('rp-tooltip');
+  const area = RP.dom.mapArea;
+  const tooltip = RP.tooltipEl = document.getElementById('rp-tooltip');
+
+  // The map can move on screen without a resize (page scroll, sidebar
+  // content above it on narrow layouts); re-measure when the pointer enters
+  canvas.addEventListener('mouseenter', rpUpdateRects);
+  window.addEventListener('scroll', () => { if (RP.initialized) rpUpdateRects(); }, { capture: true, passive: true });
 
   canvas.addEventListener('mousedown', e => {
-    const rect = canvas.getBoundingClientRect();
+    const rect = RP.canvasRect;
     const sx = e.clientX - rect.left, sy = e.clientY - rect.top;
     const nid = rpNodeAtScreen(sx, sy);
 
@@ -3239,7 +3623,7 @@ function rpBindEvents() {
         // Clicked empty space: stop connecting
         RP.edgeStart = null;
       }
-      rpDraw();
+      rpScheduleDraw();
       return;
     }
 
@@ -3269,29 +3653,32 @@ function rpBindEvents() {
   });
 
   canvas.addEventListener('mousemove', e => {
-    const rect = canvas.getBoundingClientRect();
+    const rect = RP.canvasRect;
     const sx = e.clientX - rect.left, sy = e.clientY - rect.top;
     RP.mouseX = sx; RP.mouseY = sy;
     if (RP.dragNode) {
       const [mx, my] = rpScreenToMap(sx - RP.dragOffX, sy - RP.dragOffY);
       RP.graph.nodes[RP.dragNode].x = Math.round(mx);
       RP.graph.nodes[RP.dragNode].y = Math.round(my);
-      rpDraw();
+      RP.edgePaths = null;
+      RP.nodeXY = null;
+      RP.routeArrows = null;
+      rpScheduleDraw();
       return;
     }
     if (RP.isPanning) {
       RP.viewX = sx - RP.panStartX;
       RP.viewY = sy - RP.panStartY;
-      rpDraw();
+      rpScheduleDraw();
       return;
     }
     // Redraw preview line during connect mode
-    if (RP.connectMode && RP.edgeStart) rpDraw();
+    if (RP.connectMode && RP.edgeStart) rpScheduleDraw();
     // Hover detection
     const nid = rpNodeAtScreen(sx, sy);
     if (nid !== RP.hoverNode) {
       RP.hoverNode = nid;
-      rpDraw();
+      rpScheduleDraw();
       if (nid) rpShowTooltip(nid, e.clientX, e.clientY);
       else tooltip.style.display = 'none';
     } else if (nid) {
@@ -3311,12 +3698,12 @@ function rpBindEvents() {
     RP.hoverNode = null;
     tooltip.style.display = 'none';
     canvas.style.cursor = RP.editMode ? 'crosshair' : 'grab';
-    rpDraw();
+    rpScheduleDraw();
   });
 
   canvas.addEventListener('wheel', e => {
     e.preventDefault();
-    const rect = canvas.getBoundingClientRect();
+    const rect = RP.canvasRect;
     const sx = e.clientX - rect.left, sy = e.clientY - rect.top;
     const [mx, my] = rpScreenToMap(sx, sy);
     const factor = e.deltaY < 0 ? 1.15 : 1 / 1.15;
@@ -3324,14 +3711,14 @@ function rpBindEvents() {
     RP.viewX = sx - mx * newZoom;
     RP.viewY = sy - my * newZoom;
     RP.zoom = newZoom;
-    rpDraw();
+    rpScheduleDraw();
   }, { passive: false });
 
   // Context menu for editor
   canvas.addEventListener('contextmenu', e => {
     e.preventDefault();
     if (!RP.editMode) return;
-    const rect = canvas.getBoundingClientRect();
+    const rect = RP.canvasRect;
     const sx = e.clientX - rect.left, sy = e.clientY - rect.top;
     const nid = rpNodeAtScreen(sx, sy);
     if (nid) rpEditorContextMenu(nid, e.clientX, e.clientY);
@@ -3343,42 +3730,59 @@ function rpBindEvents() {
   document.getElementById('rp-calculate').addEventListener('click', rpCalculateRoute);
 
   // Editor buttons
-  document.getElementById('rp-edit-toggle').addEventListener('click', rpToggleEditor);
-  document.getElementById('rp-edit-connect').addEventListener('click', rpToggleConnect);
-  document.getElementById('rp-edit-water').addEventListener('click', rpToggleWaterMode);
-  document.getElementById('rp-edit-save').addEventListener('click', rpSaveGraph);
-  document.getElementById('rp-edit-reset').addEventListener('click', rpResetGraph);
-  document.getElementById('rp-edit-export').addEventListener('click', rpExportGraph);
+  RP.dom.editToggle.addEventListener('click', rpToggleEditor);
+  RP.dom.connectBtn.addEventListener('click', rpToggleConnect);
+  RP.dom.waterBtn.addEventListener('click', rpToggleWaterMode);
+  RP.dom.saveBtn.addEventListener('click', rpSaveGraph);
+  RP.dom.resetBtn.addEventListener('click', rpResetGraph);
+  RP.dom.exportBtn.addEventListener('click', rpExportGraph);
+  RP.dom.modalOk.addEventListener('click', () => rpCloseModal(true));
+  RP.dom.modalCancel.addEventListener('click', () => rpCloseModal(false));
+  RP.dom.modal.addEventListener('keydown', e => {
+    if (e.key === 'Enter' && e.target === RP.dom.modalInput) rpCloseModal(true);
+    else if (e.key === 'Escape') rpCloseModal(false);
+  });
 
   // Item search filter
-  document.getElementById('rp-item-search').addEventListener('input', e => {
+  RP.dom.itemSearch.addEventListener('input', e => {
     rpFilterItemDropdown(e.target.value);
   });
-  document.getElementById('rp-item-dropdown').addEventListener('click', e => {
+  RP.dom.itemDropdown.addEventListener('click', e => {
     const item = e.target.closest('.rp-item-dropdown-item');
     if (!item) return;
     const name = item.dataset.name;
     if (name) {
       rpAddItemByName(name);
-      document.getElementById('rp-item-search').value = '';
-      document.getElementById('rp-item-dropdown').classList.remove('active');
+      RP.dom.itemSearch.value = '';
+      RP.dom.itemDropdown.classList.remove('active');
     }
   });
-  document.getElementById('rp-item-search').addEventListener('focusin', () => {
-    const q = document.getElementById('rp-item-search').value.trim();
+  RP.dom.itemSearch.addEventListener('focusin', () => {
+    const q = RP.dom.itemSearch.value.trim();
     if (q.length >= 1) rpFilterItemDropdown(q);
   });
   document.addEventListener('click', e => {
     if (!e.target.closest('.rp-item-search-wrap')) {
-      document.getElementById('rp-item-dropdown').classList.remove('active');
+      RP.dom.itemDropdown.classList.remove('active');
     }
   });
 }
 
 function rpShowTooltip(nid, cx, cy) {
-  const tooltip = document.getElementById('rp-tooltip');
+  const tooltip = RP.tooltipEl;
   const n = RP.graph.nodes[nid];
   if (!n) return;
+  if (RP.tooltipNode !== nid) {
+    RP.tooltipNode = nid;
+    tooltip.innerHTML = rpTooltipHtml(nid, n);
+  }
+  tooltip.style.display = 'block';
+  const aRect = RP.areaRect;
+  tooltip.style.left = (cx - aRect.left + 15) + 'px';
+  tooltip.style.top = (cy - aRect.top + 15) + 'px';
+}
+
+function rpTooltipHtml(nid, n) {
   let html = '<div class="tt-name">' + esc(n.name || nid) + '</div>';
   html += '<div class="tt-info">';
   if (n.type) html += 'Type: ' + esc(n.type) + '<br>';
@@ -3386,67 +3790,85 @@ function rpShowTooltip(nid, cx, cy) {
   if (n.enemies && n.enemies.length) html += 'Enemies: ' + n.enemies.slice(0, 5).map(esc).join(', ') + (n.enemies.length > 5 ? '...' : '') + '<br>';
   if (n.resources && n.resources.length) html += 'Resources: ' + n.resources.map(esc).join(', ') + '<br>';
   html += '</div>';
-  tooltip.innerHTML = html;
-  tooltip.style.display = 'block';
-  const area = document.getElementById('rp-map-area');
-  const aRect = area.getBoundingClientRect();
-  tooltip.style.left = (cx - aRect.left + 15) + 'px';
-  tooltip.style.top = (cy - aRect.top + 15) + 'px';
+  return html;
 }
 
 // --- Dropdown Population ---
+// Route item categories in display order, with their dropdown badge class
+const RP_ITEM_CATEGORIES = [['Armor', 'cat-armor'], ['Weapon', 'cat-weapon'], ['Accessory', 'cat-accessory'],
+  ['Item', 'cat-item'], ['Building', 'cat-building']];
+const RP_ITEM_CATEGORY_CLASS = new Map(RP_ITEM_CATEGORIES);
+
+function rpItemGroups() {
+  return new Map(RP_ITEM_CATEGORIES.map(([group]) => [group, []]));
+}
+
+// Every plannable item as { group, name, lower }, grouped by category and
+// sorted by name, shared by the item select and the search dropdown
+let rpItemIndex = null;
+function rpGetItemIndex() {
+  if (!rpItemIndex) {
+    const groups = rpItemGroups();
+    DATA.armorWeapons.forEach(i => {
+      groups.get((i.type || '').includes('Armor') ? 'Armor' : 'Weapon').push(i.name);
+    });
+    DATA.accessories.forEach(i => {
+      groups.get((i.type || '').includes('Accessory') ? 'Accessory' : 'Item').push(i.name);
+    });
+    DATA.buildings.forEach(i => groups.get('Building').push(i.name));
+    rpItemIndex = [];
+    for (const [group, names] of groups) {
+      names.sort().forEach(name => rpItemIndex.push({ group, name, lower: name.toLowerCase() }));
+    }
+  }
+  return rpItemIndex;
+}
+
 function rpPopulateItems() {
-  const sel = document.getElementById('rp-item-select');
+  const sel = RP.dom.itemSelect;
   // Group by type
-  const groups = { 'Armor': [], 'Weapon': [], 'Accessory': [], 'Item': [], 'Building': [] };
-  DATA.armorWeapons.forEach(i => {
-    const t = (i.type || '').includes('Armor') ? 'Armor' : 'Weapon';
-    groups[t].push(i.name);
-  });
-  DATA.accessories.forEach(i => {
-    const t = (i.type || '').includes('Accessory') ? 'Accessory' : 'Item';
-    groups[t].push(i.name);
-  });
-  DATA.buildings.forEach(i => {
-    groups['Building'].push(i.name);
-  });
-  let html = '<option value="">-- Select an item --</option>';
-  for (const [group, items] of Object.entries(groups)) {
+  const groups = rpItemGroups();
+  for (const it of rpGetItemIndex()) groups.get(it.group).push(it.name);
+  const frag = document.createDocumentFragment();
+  frag.appendChild(rpOption('', '-- Select an item --'));
+  for (const [group, items] of groups) {
     if (!items.length) continue;
-    html += '<optgroup label="' + esc(group) + '">';
-    items.sort().forEach(name => {
-      html += '<option value="' + esc(name) + '">' + esc(name) + '</option>';
-    });
-    html += '</optgroup>';
+    const og = rpOptgroup(group);
+    items.forEach(name => og.appendChild(rpOption(name, name)));
+    frag.appendChild(og);
   }
-  sel.innerHTML = html;
+  sel.replaceChildren(frag);
+}
+
+function rpOption(value, text) {
+  const opt = document.createElement('option');
+  opt.value = value;
+  opt.textContent = text;
+  return opt;
+}
+
+function rpOptgroup(label) {
+  const og = document.createElement('optgroup');
+  og.label = label;
+  return og;
 }
 
 function rpFilterItemDropdown(query) {
-  const dd = document.getElementById('rp-item-dropdown');
+  const dd = RP.dom.itemDropdown;
   const q = (query || '').toLowerCase();
   if (!q || q.length < 1) { dd.classList.remove('active'); return; }
-  const groups = { 'Armor': [], 'Weapon': [], 'Accessory': [], 'Item': [], 'Building': [] };
-  const catColors = { 'Armor': 'cat-armor', 'Weapon': 'cat-weapon', 'Accessory': 'cat-accessory', 'Item': 'cat-item', 'Building': 'cat-building' };
-  DATA.armorWeapons.forEach(i => {
-    const t = (i.type || '').includes('Armor') ? 'Armor' : 'Weapon';
-    if (i.name.toLowerCase().includes(q)) groups[t].push(i.name);
-  });
-  DATA.accessories.forEach(i => {
-    const t = (i.type || '').includes('Accessory') ? 'Accessory' : 'Item';
-    if (i.name.toLowerCase().includes(q)) groups[t].push(i.name);
-  });
-  DATA.buildings.forEach(i => {
-    if (i.name.toLowerCase().includes(q)) groups['Building'].push(i.name);
-  });
+  const groups = rpItemGroups();
+  for (const it of rpGetItemIndex()) {
+    if (it.lower.includes(q)) groups.get(it.group).push(it.name);
+  }
   let html = '';
   let total = 0;
-  for (const [group, items] of Object.entries(groups)) {
+  for (const [group, items] of groups) {
     if (!items.length) continue;
     html += '<div class="rp-item-dropdown-group">' + esc(group) + '</div>';
-    items.sort().forEach(name => {
+    items.forEach(name => {
       html += '<div class="rp-item-dropdown-item" data-name="' + esc(name) + '">';
-      html += '<span class="search-dropdown-cat ' + (catColors[group] || '') + '">' + esc(group) + '</span>';
+      html += '<span class="search-dropdown-cat ' + RP_ITEM_CATEGORY_CLASS.get(group) + '">' + esc(group) + '</span>';
       html += '<span>' + esc(name) + '</span></div>';
       total++;
     });
@@ -3457,20 +3879,17 @@ function rpFilterItemDropdown(query) {
 }
 
 function rpPopulateStartLocations() {
-  const sel = document.getElementById('rp-start-select');
-  let html = '<optgroup label="Towns">';
+  const sel = RP.dom.startSelect;
+  const towns = rpOptgroup('Towns');
   for (const [nid, n] of Object.entries(RP.graph.nodes)) {
-    if (n.type === 'town') html += '<option value="' + esc(nid) + '">' + esc(n.name) + '</option>';
+    if (n.type === 'town') towns.appendChild(rpOption(nid, n.name));
   }
-  html += '</optgroup><optgroup label="Numbered Nodes">';
+  const numbered = rpOptgroup('Numbered Nodes');
   const numNodes = Object.entries(RP.graph.nodes)
     .filter(([nid, n]) => !n.type)
     .sort((a, b) => parseInt(a[0]) - parseInt(b[0]));
-  numNodes.forEach(([nid, n]) => {
-    html += '<option value="' + esc(nid) + '">Node ' + esc(nid) + '</option>';
-  });
-  html += '</optgroup>';
-  sel.innerHTML = html;
+  numNodes.forEach(([nid, n]) => numbered.appendChild(rpOption(nid, 'Node ' + nid)));
+  sel.replaceChildren(towns, numbered);
 }
 
 // --- Multi-item route list ---
@@ -3478,7 +3897,7 @@ let rpItemList = [];
 let rpSourceMode = 'all'; // 'all' or 'enemies'
 
 function rpRenderItemList() {
-  const el = document.getElementById('rp-item-list');
+  const el = RP.dom.itemList;
   if (!rpItemList.length) {
     el.innerHTML = '<div class="rp-item-list-empty">No items added. Select items above or use "Add to Route" on craft cards.</div>';
     return;
@@ -3489,7 +3908,7 @@ function rpRenderItemList() {
 }
 
 function rpAddSelectedItem() {
-  const sel = document.getElementById('rp-item-select');
+  const sel = RP.dom.itemSelect;
   if (!sel.value) return;
   if (!rpItemList.includes(sel.value)) {
     rpItemList.push(sel.value);
@@ -3530,14 +3949,19 @@ function addToRouteAndGo(itemName) {
 
 // --- Route Calculation UI ---
 function rpCalculateRoute() {
-  const startNode = document.getElementById('rp-start-select').value;
-  const chapter = document.getElementById('rp-chapter-select').value;
-  const resultsDiv = document.getElementById('rp-route-results');
-  const summaryDiv = document.getElementById('rp-route-summary');
+  const startNode = RP.dom.startSelect.value;
+  const chapter = RP.dom.chapterSelect.value;
+  const resultsDiv = RP.dom.results;
+  const summaryDiv = RP.dom.summary;
 
   if (!rpItemList.length) { resultsDiv.innerHTML = '<div class="empty-msg">Please add at least one item to craft.</div>'; return; }
 
-  const result = rpComputeRouteMulti(rpItemList, startNode, chapter);
+  const key = rpSourceMode + '|' + chapter + '|' + startNode + '|' + rpItemList.join('\n');
+  let result = RP.routeCache.get(key);
+  if (result === undefined) {
+    result = rpComputeRouteMulti(rpItemList, startNode, chapter);
+    RP.routeCache.set(key, result);
+  }
   if (!result) { resultsDiv.innerHTML = '<div class="empty-msg">No crafting materials found for these items.</div>'; summaryDiv.style.display = 'none'; return; }
   if (result.error) { resultsDiv.innerHTML = '<div class="empty-msg" style="color:var(--red);">' + esc(result.error) + '</div>'; summaryDiv.style.display = 'none'; return; }
 
@@ -3545,31 +3969,89 @@ function rpCalculateRoute() {
 
   // Show summary
   summaryDiv.style.display = 'block';
-  let summaryHtml = '<span class="label">Items:</span> <span class="value">' + rpItemList.map(n => esc(n)).join(', ') + '</span><br>';
-  summaryHtml += '<span class="label">Total steps:</span> <span class="value">' + result.totalDist + '</span> | <span class="label">Stops:</span> <span class="value">' + result.stops.length + '</span>';
-  summaryDiv.innerHTML = summaryHtml;
+  summaryDiv.replaceChildren(
+    rpSpan('label', 'Items:'), ' ', rpSpan('value', rpItemList.join(', ')), document.createElement('br'),
+    rpSpan('label', 'Total steps:'), ' ', rpSpan('value', String(result.totalDist)), ' | ',
+    rpSpan('label', 'Stops:'), ' ', rpSpan('value', String(result.stops.length)));
 
   // Show step-by-step
-  let html = '<div class="rp-step" onclick="rpZoomToNode(\'' + esc(startNode) + '\')">';
-  html += '<div class="rp-step-num" style="background:var(--green);">S</div>';
-  html += '<div class="rp-step-info"><div class="rp-step-node">Start: ' + esc(RP.graph.nodes[startNode].name || startNode) + '</div></div></div>';
-
+  const frag = document.createDocumentFragment();
+  const startStep = rpDiv('rp-step');
+  startStep.dataset.action = 'route-zoom';
+  startStep.dataset.id = startNode;
+  const startNum = rpDiv('rp-step-num', 'S');
+  startNum.style.background = 'var(--green)';
+  const startInfo = rpDiv('rp-step-info');
+  startInfo.appendChild(rpDiv('rp-step-node', 'Start: ' + (RP.graph.nodes[startNode].name || startNode)));
+  startStep.append(startNum, startInfo);
+  frag.appendChild(startStep);
+
+  // Stops at the same node as last time keep their elements; only the
+  // parts that depend on the new route are rewritten
+  const keep = new Set(result.stops.map(s => s.nodeId));
+  for (const nid of RP.stepViews.keys()) if (!keep.has(nid)) RP.stepViews.delete(nid);
   result.stops.forEach((s, i) => {
-    const n = RP.graph.nodes[s.nodeId];
+    const v = rpStepView(s.nodeId);
     const stepId = 'rp-stop-' + i;
-    html += '<div class="rp-step">';
-    html += '<div class="rp-step-num" onclick="rpZoomToNode(\'' + esc(s.nodeId) + '\')" style="cursor:pointer;">' + (i + 1) + '</div>';
-    html += '<div class="rp-step-info">';
-    html += '<div class="rp-step-node" onclick="rpZoomToNode(\'' + esc(s.nodeId) + '\')" style="cursor:pointer;">' + esc(n ? n.name || s.nodeId : s.nodeId) + '</div>';
-    html += '<div class="rp-step-mats">Collect: ';
-    html += s.materials.map(mat => '<span class="rp-mat-link" onclick="event.stopPropagation();rpToggleMatDetail(\'' + stepId + '\',\'' + escJs(mat) + '\',\'' + escJs(s.nodeId) + '\')">' + esc(mat) + '</span>').join(', ');
-    html += '</div>';
-    html += '<div class="rp-step-dist">' + s.distFromPrev + ' step' + (s.distFromPrev !== 1 ? 's' : '') + ' from previous</div>';
-    html += '<div id="' + esc(stepId) + '-detail"></div>';
-    html += '</div></div>';
+    v.num.textContent = String(i + 1);
+    v.dist.textContent = s.distFromPrev + ' step' + (s.distFromPrev !== 1 ? 's' : '') + ' from previous';
+    const matsKey = stepId + '\n' + s.materials.join('\n');
+    if (v.matsKey !== matsKey) {
+      v.matsKey = matsKey;
+      v.mats.textContent = 'Collect: ';
+      s.materials.forEach((mat, k) => {
+        if (k) v.mats.append(', ');
+        const link = rpSpan('rp-mat-link', mat);
+        link.dataset.action = 'route-mat';
+        link.dataset.id = mat;
+        link.dataset.step = stepId;
+        link.dataset.node = s.nodeId;
+        v.mats.appendChild(link);
+      });
+      v.detail.id = stepId + '-detail';
+      v.detail.replaceChildren();
+      delete v.detail.dataset.showing;
+    }
+    frag.appendChild(v.el);
   });
-  resultsDiv.innerHTML = html;
-  rpDraw();
+  resultsDiv.replaceChildren(frag);
+  rpScheduleDraw();
+}
+
+// Elements of one route stop's row, reused while the node stays on the route
+function rpStepView(nodeId) {
+  let v = RP.stepViews.get(nodeId);
+  if (!v) {
+    const n = RP.graph.nodes[nodeId];
+    v = { el: rpDiv('rp-step'), num: rpDiv('rp-step-num'), mats: rpDiv('rp-step-mats'),
+      dist: rpDiv('rp-step-dist'), detail: rpDiv(''), matsKey: null };
+    const node = rpDiv('rp-step-node', n ? n.name || nodeId : nodeId);
+    for (const el of [v.num, node]) {
+      el.style.cursor = 'pointer';
+      el.dataset.action = 'route-zoom';
+      el.dataset.id = nodeId;
+    }
+    const info = rpDiv('rp-step-info');
+    info.append(node, v.mats, v.dist, v.detail);
+    v.el.append(v.num, info);
+    RP.stepViews.set(nodeId, v);
+  }
+  return v;
+}
+
+function rpDiv(cls, text) {
+  return rpEl('div', cls, text);
+}
+
+function rpSpan(cls, text) {
+  return rpEl('span', cls, text);
+}
+
+function rpEl(tag, cls, text) {
+  const el = document.createElement(tag);
+  if (cls) el.className = cls;
+  if (text != null) el.textContent = text;
+  return el;
 }
 
 function rpZoomToNode(nid) {
@@ -3579,43 +4061,34 @@ function rpZoomToNode(nid) {
   RP.zoom = 0.8;
   RP.viewX = cw / 2 - n.x * RP.zoom;
   RP.viewY = ch / 2 - n.y * RP.zoom;
-  rpDraw();
+  rpScheduleDraw();
 }
 
 function rpToggleMatDetail(stepId, matName, nodeId) {
   const el = document.getElementById(stepId + '-detail');
   if (!el) return;
   // Toggle: if already showing this material, close it
-  if (el.dataset.showing === matName) { el.innerHTML = ''; el.dataset.showing = ''; return; }
+  if (el.dataset.showing === matName) { el.replaceChildren(); el.dataset.showing = ''; return; }
   el.dataset.showing = matName;
 
-  let html = '<div class="rp-mat-detail">';
-  html += '<b>' + esc(matName) + '</b> at <b>' + esc(nodeId) + '</b>:<br>';
+  const box = rpDiv('rp-mat-detail');
+  box.append(rpEl('b', '', matName), ' at ', rpEl('b', '', nodeId), ':', document.createElement('br'));
+  const line = (...parts) => box.append(...parts, document.createElement('br'));
+  const dim = text => {
+    const span = rpSpan('', text);
+    span.style.color = 'var(--text2)';
+    return span;
+  };
   let found = false;
 
   // Enemies that drop this material at this node
-  if (materialToEnemies[matName]) {
-    const nodeNum = nodeId;
-    const nodeNode = RP.graph.nodes[nodeId];
-    const nodeName = nodeNode ? nodeNode.name || nodeId : nodeId;
-    materialToEnemies[matName].forEach(enemy => {
-      // Check if this enemy appears at this node in any chapter
-      const chaptersHere = [];
-      for (const [ch, locStr] of Object.entries(enemy.locations)) {
-        const parts = locStr.split(',').map(p => p.trim().replace(/\.$/, ''));
-        // Match numbered nodes or special area IDs
-        const matches = parts.some(p => {
-          if (p === nodeNum) return true;
-          const saId = _specialAreaMap[p];
-          if (saId === nodeId) return true;
-          return false;
-        });
-        if (matches) chaptersHere.push(ch.replace('Chapter ', 'Ch'));
-      }
-      if (chaptersHere.length) {
-        found = true;
-        html += '<span class="rp-md-enemy">' + esc(enemy.name) + '</span> ' + esc(enemy.rating || '') + ' (ATK ' + esc(enemy.attack) + ' DEF ' + esc(enemy.defense) + ' HP ' + esc(enemy.hp) + ') <span style="color:var(--text2);">' + chaptersHere.join(', ') + '</span><br>';
-      }
+  const hits = rpGetMatNodeEnemies().get(matName);
+  if (hits && hits.has(nodeId)) {
+    found = true;
+    hits.get(nodeId).forEach(({ enemy, chapters }) => {
+      line(rpSpan('rp-md-enemy', enemy.name),
+        ' ' + (enemy.rating || '') + ' (ATK ' + enemy.attack + ' DEF ' + enemy.defense + ' HP ' + enemy.hp + ') ',
+        dim(chapters.join(', ')));
     });
   }
 
@@ -3627,24 +4100,21 @@ function rpToggleMatDetail(stepId, matName, nodeId) {
       Object.entries(m.prices).forEach(([town, p]) => {
         if (p.buy && rpTownId(town) === nodeId) {
           found = true;
-          html += '<span class="rp-md-market">Buy at ' + esc(town) + ': ' + esc(p.buy) + ' silver</span><br>';
+          line(rpSpan('rp-md-market', 'Buy at ' + town + ': ' + p.buy + ' silver'));
         }
       });
     }
   }
 
   // Harvest
-  if (DATA.harvestLocations[matName]) {
-    const parts = String(DATA.harvestLocations[matName]).split(',').map(p => p.trim());
-    if (parts.includes(nodeId)) {
-      found = true;
-      html += '<span class="rp-md-source">Harvest/mine here</span><br>';
-    }
+  const harvest = harvestLocationParts.get(matName);
+  if (harvest && harvest.has(nodeId)) {
+    found = true;
+    line(rpSpan('rp-md-source', 'Harvest/mine here'));
   }
 
-  if (!found) html += '<span style="color:var(--text2);">Source info not available for this node</span>';
-  html += '</div>';
-  el.innerHTML = html;
+  if (!found) box.appendChild(dim('Source info not available for this node'));
+  el.replaceChildren(box);
 }
 
 // --- Known node IDs from game data (for quick-add suggestions) ---
@@ -3661,20 +4131,72 @@ const KNOWN_SPECIAL = [
   {id:'ic_abandoned_quarters',name:'IC - Abandoned Quarters'},{id:'ic_frozen_lake',name:'IC - Frozen Lake'},{id:'ic_glacial_worm_bones',name:'IC - Glacial Worm Bones'},
   {id:'ic_hall_of_ice',name:'IC - Hall of Ice'},{id:'ic_old_armory',name:'IC - Old Armory'},{id:'ic_ossuary',name:'IC - Ossuary'}
 ];
+// Known town/special entries by id and by lowercased name
+function knownNodeIndex(list) {
+  const index = new Map();
+  list.forEach(k => { index.set(k.id, k); index.set(k.name.toLowerCase(), k); });
+  return index;
+}
+const KNOWN_TOWN_INDEX = knownNodeIndex(KNOWN_TOWNS);
+const KNOWN_SPECIAL_INDEX = knownNodeIndex(KNOWN_SPECIAL);
+
+// Typed node ids: allowed characters, an optional "FW - " / "IC - " area
+// prefix, and the runs of spaces/hyphens that become "_" in a generated id
+const NODE_ID_CHARS = /^[a-zA-Z0-9_ \-]+$/;
+const NODE_AREA_PREFIX = /^(FW|IC)\s*-\s*(.+)$/i;
+const NODE_ID_SEPARATORS = /[\s\-]+/g;
+
+function rpNodeIdSlug(name) {
+  return name.toLowerCase().replace(NODE_ID_SEPARATORS, '_');
+}
+
+// --- Editor dialogs ---
+// In-page stand-ins for alert/confirm/prompt, which would block the page
+// (and the map's redraws) while open. Each returns a Promise of what the
+// native call would have returned.
+function rpModal(msg, { value = null, cancel = true } = {}) {
+  rpCloseModal(false);
+  const { modal, modalMsg, modalInput, modalOk, modalCancel } = RP.dom;
+  modalMsg.textContent = msg;
+  modalInput.style.display = value === null ? 'none' : '';
+  modalInput.value = value || '';
+  modalCancel.style.display = cancel ? '' : 'none';
+  modal.classList.add('active');
+  (value === null ? modalOk : modalInput).focus();
+  return new Promise(resolve => {
+    RP.modalResolve = ok => resolve(value === null ? ok : ok ? modalInput.value : null);
+  });
+}
+
+function rpCloseModal(ok) {
+  const resolve = RP.modalResolve;
+  if (!resolve) return;
+  RP.modalResolve = null;
+  RP.dom.modal.classList.remove('active');
+  resolve(ok);
+}
+
+function rpAlert(msg) { return rpModal(msg, { cancel: false }); }
+function rpConfirm(msg) { return rpModal(msg); }
+function rpPrompt(msg, value) { return rpModal(msg, { value: value || '' }); }
 
 // --- Editor Mode ---
 function rpToggleEditor() {
+  if (RP.graph === DATA.mapGraph) {
+    RP.graph = structuredClone(DATA.mapGraph);
+    rpBuildAdj(); // the draw lists point at the old node objects
+  }
   RP.editMode = !RP.editMode;
   RP.connectMode = false;
   RP.waterEdgeMode = false;
   RP.edgeStart = null;
-  const btn = document.getElementById('rp-edit-toggle');
-  const connectBtn = document.getElementById('rp-edit-connect');
-  const waterBtn = document.getElementById('rp-edit-water');
-  const saveBtn = document.getElementById('rp-edit-save');
-  const resetBtn = document.getElementById('rp-edit-reset');
-  const exportBtn = document.getElementById('rp-edit-export');
-  const helpDiv = document.getElementById('rp-editor-help');
+  const btn = RP.dom.editToggle;
+  const connectBtn = RP.dom.connectBtn;
+  const waterBtn = RP.dom.waterBtn;
+  const saveBtn = RP.dom.saveBtn;
+  const resetBtn = RP.dom.resetBtn;
+  const exportBtn = RP.dom.exportBtn;
+  const helpDiv = RP.dom.editorHelp;
   btn.textContent = RP.editMode ? 'Exit Editor' : 'Edit Map';
   btn.style.background = RP.editMode ? 'var(--accent)' : '';
   btn.style.color = RP.editMode ? '#fff' : '';
@@ -3689,7 +4211,7 @@ function rpToggleEditor() {
   helpDiv.style.display = show;
   RP.canvas.style.cursor = RP.editMode ? 'crosshair' : 'grab';
   RP.canvas.classList.toggle('editor-mode', RP.editMode);
-  rpDraw();
+  rpScheduleDraw();
 }
 
 function rpToggleConnect() {
@@ -3697,11 +4219,11 @@ function rpToggleConnect() {
   RP.edgeStart = null;
   rpStyleConnectBtn();
   RP.canvas.style.cursor = RP.connectMode ? 'pointer' : 'crosshair';
-  rpDraw();
+  rpScheduleDraw();
 }
 
 function rpStyleConnectBtn() {
-  const connectBtn = document.getElementById('rp-edit-connect');
+  const connectBtn = RP.dom.connectBtn;
   if (RP.connectMode) {
     connectBtn.textContent = 'Stop Connecting';
     connectBtn.style.background = '#66bb6a';
@@ -3719,7 +4241,7 @@ function rpToggleWaterMode() {
 }
 
 function rpStyleWaterBtn() {
-  const btn = document.getElementById('rp-edit-water');
+  const btn = RP.dom.waterBtn;
   if (RP.waterEdgeMode) {
     btn.textContent = 'Water: ON';
     btn.style.background = '#42a5f5';
@@ -3731,7 +4253,7 @@ function rpStyleWaterBtn() {
   }
 }
 
-function rpAddNodePrompt(mx, my) {
+async function rpAddNodePrompt(mx, my) {
   // Build a list of missing known IDs the user hasn't placed yet
   const existing = new Set(Object.keys(RP.graph.nodes));
   const missingNums = KNOWN_NODE_IDS.filter(id => !existing.has(id));
@@ -3747,20 +4269,21 @@ function rpAddNodePrompt(mx, my) {
   if (missingTowns.length) promptMsg += '\n\nMissing towns: ' + missingTowns.map(t => t.id + ' (' + t.name + ')').join(', ');
   if (missingSpecial.length) promptMsg += '\n\nMissing special: ' + missingSpecial.map(s => s.id).join(', ');
 
-  const nodeId = prompt(promptMsg, suggestion);
+  const nodeId = await rpPrompt(promptMsg, suggestion);
   if (!nodeId || !nodeId.trim()) return;
   let nid = nodeId.trim();
 
   // Validate: only allow safe characters (letters, numbers, underscores, hyphens, spaces)
-  if (!/^[a-zA-Z0-9_ \-]+$/.test(nid)) { alert('Node ID must contain only letters, numbers, spaces, hyphens, and underscores.'); return; }
+  if (!NODE_ID_CHARS.test(nid)) { rpAlert('Node ID must contain only letters, numbers, spaces, hyphens, and underscores.'); return; }
 
   // Normalize input: try to match against known IDs flexibly
-  const nidLower = nid.toLowerCase().replace(/[\s\-]+/g, '_');
+  const nidLower = rpNodeIdSlug(nid);
+  const nameLower = nid.toLowerCase();
   // Check if input matches a known town by id or name
-  const townMatch = KNOWN_TOWNS.find(t => t.id === nid || t.id === nidLower || t.name.toLowerCase() === nid.toLowerCase());
+  const townMatch = KNOWN_TOWN_INDEX.get(nid) || KNOWN_TOWN_INDEX.get(nidLower) || KNOWN_TOWN_INDEX.get(nameLower);
   if (townMatch) nid = townMatch.id;
   // Check if input matches a known special area by id or name
-  const specMatch = KNOWN_SPECIAL.find(s => s.id === nid || s.id === nidLower || s.name.toLowerCase() === nid.toLowerCase());
+  const specMatch = KNOWN_SPECIAL_INDEX.get(nid) || KNOWN_SPECIAL_INDEX.get(nidLower) || KNOWN_SPECIAL_INDEX.get(nameLower);
   if (specMatch) nid = specMatch.id;
 
   // If not matched and looks like a custom location name, generate a proper node ID
@@ -3768,7 +4291,7 @@ function rpAddNodePrompt(mx, my) {
   let customPrefix = null;
   if (!townMatch && !specMatch && isNaN(parseInt(nid))) {
     // Check if user already included a prefix like "FW - " or "IC - "
-    const prefixMatch = nid.match(/^(FW|IC)\s*-\s*(.+)$/i);
+    const prefixMatch = nid.match(NODE_AREA_PREFIX);
     if (prefixMatch) {
       customPrefix = prefixMatch[1].toUpperCase();
       nid = prefixMatch[2].trim();
@@ -3777,11 +4300,11 @@ function rpAddNodePrompt(mx, my) {
 
   if (!townMatch && !specMatch && isNaN(parseInt(nid)) && !customPrefix) {
     // Ask if this is a FW, IC, or other area
-    const areaType = prompt('Is this a special area? Enter prefix:\\n  FW = Frozen Wastes\\n  IC = Ice Caves\\n  (leave blank for generic node)', '');
+    const areaType = await rpPrompt('Is this a special area? Enter prefix:\n  FW = Frozen Wastes\n  IC = Ice Caves\n  (leave blank for generic node)', '');
     if (areaType !== null && areaType.trim()) {
       customPrefix = areaType.trim().toUpperCase();
       if (customPrefix !== 'FW' && customPrefix !== 'IC') {
-        alert('Prefix must be FW or IC.'); return;
+        rpAlert('Prefix must be FW or IC.'); return;
       }
     }
   }
@@ -3793,24 +4316,24 @@ function rpAddNodePrompt(mx, my) {
   else if (specMatch) { nodeType = 'special'; nodeName = specMatch.name; nid = specMatch.id; }
   else if (customPrefix) {
     nodeName = customPrefix + ' - ' + nid;
-    nid = customPrefix.toLowerCase() + '_' + nid.toLowerCase().replace(/[\s\-]+/g, '_');
+    nid = customPrefix.toLowerCase() + '_' + rpNodeIdSlug(nid);
     nodeType = 'special';
   } else if (isNaN(parseInt(nid))) {
     // Generic named node — generate a safe ID
-    let safeId = nid.toLowerCase().replace(/[\s\-]+/g, '_');
-    if (RP.graph.nodes[safeId]) { alert('Node "' + safeId + '" already exists.'); return; }
+    let safeId = rpNodeIdSlug(nid);
+    if (RP.graph.nodes[safeId]) { rpAlert('Node "' + safeId + '" already exists.'); return; }
     nodeName = nid;
     nid = safeId;
   }
 
-  if (RP.graph.nodes[nid]) { alert('Node "' + nid + '" already exists. Drag it to move.'); return; }
+  if (RP.graph.nodes[nid]) { rpAlert('Node "' + nid + '" already exists. Drag it to move.'); return; }
 
   const nodeData = { x: mx, y: my, name: nodeName, chapters: [], enemies: [], resources: [] };
   if (nodeType) nodeData.type = nodeType;
   RP.graph.nodes[nid] = nodeData;
   rpBuildAdj();
   rpPopulateStartLocations();
-  rpDraw();
+  rpScheduleDraw();
 }
 
 function rpToggleEdge(a, b) {
@@ -3823,39 +4346,39 @@ function rpToggleEdge(a, b) {
     else edges.push([a, b]);
   }
   rpBuildAdj();
-  rpDraw();
+  rpScheduleDraw();
 }
 
-function rpEditorContextMenu(nid, cx, cy) {
+async function rpEditorContextMenu(nid, cx, cy) {
   const n = RP.graph.nodes[nid];
-  if (confirm('Delete node "' + (n.name || nid) + '"? This removes the node and all its edges.')) {
+  if (await rpConfirm('Delete node "' + (n.name || nid) + '"? This removes the node and all its edges.')) {
     delete RP.graph.nodes[nid];
     RP.graph.edges = RP.graph.edges.filter(([a, b]) => a !== nid && b !== nid);
     rpBuildAdj();
     rpPopulateStartLocations();
-    rpDraw();
+    rpScheduleDraw();
   }
 }
 
 function rpSaveGraph() {
   localStorage.setItem('tig_map_graph', JSON.stringify(RP.graph));
-  alert('Map graph saved to localStorage! (' + Object.keys(RP.graph.nodes).length + ' nodes, ' + RP.graph.edges.length + ' edges)');
+  rpAlert('Map graph saved to localStorage! (' + Object.keys(RP.graph.nodes).length + ' nodes, ' + RP.graph.edges.length + ' edges)');
 }
 
-function rpResetGraph() {
-  if (!confirm('Reset to built-in defaults? This discards all placed nodes and edges.')) return;
+async function rpResetGraph() {
+  if (!await rpConfirm('Reset to built-in defaults? This discards all placed nodes and edges.')) return;
   localStorage.removeItem('tig_map_graph');
-  RP.graph = JSON.parse(JSON.stringify(DATA.mapGraph));
+  RP.graph = structuredClone(DATA.mapGraph);
   rpBuildAdj();
   rpPopulateStartLocations();
-  rpDraw();
+  rpScheduleDraw();
 }
 
 function rpExportGraph() {
   const json = JSON.stringify(RP.graph, null, 2);
   // Copy to clipboard
   navigator.clipboard.writeText(json).then(() => {
-    alert('Graph JSON copied to clipboard! (' + Object.keys(RP.graph.nodes).length + ' nodes, ' + RP.graph.edges.length + ' edges)\n\nPaste into MAP_GRAPH in build_app.py to make it permanent.');
+    rpAlert('Graph JSON copied to clipboard! (' + Object.keys(RP.graph.nodes).length + ' nodes, ' + RP.graph.edges.length + ' edges)\n\nPaste into MAP_GRAPH in build_app.py to make it permanent.');
   }).catch(() => {
     // Fallback: open in a new window
     const w = window.open('', '_blank');
@@ -3874,61 +4397,79 @@ function planRouteFor(itemName) {
 }
 
 // --- Init ---
+RP.dom = {
+  itemSelect: document.getElementById('rp-item-select'),
+  itemSearch: document.getElementById('rp-item-search'),
+  itemDropdown: document.getElementById('rp-item-dropdown'),
+  itemList: document.getElementById('rp-item-list'),
+  startSelect: document.getElementById('rp-start-select'),
+  chapterSelect: document.getElementById('rp-chapter-select'),
+  results: document.getElementById('rp-route-results'),
+  summary: document.getElementById('rp-route-summary'),
+  mapArea: document.getElementById('rp-map-area'),
+  editToggle: document.getElementById('rp-edit-toggle'),
+  connectBtn: document.getElementById('rp-edit-connect'),
+  waterBtn: document.getElementById('rp-edit-water'),
+  saveBtn: document.getElementById('rp-edit-save'),
+  resetBtn: document.getElementById('rp-edit-reset'),
+  exportBtn: document.getElementById('rp-edit-export'),
+  editorHelp: document.getElementById('rp-editor-help'),
+  modal: document.getElementById('rp-modal'),
+  modalMsg: document.getElementById('rp-modal-msg'),
+  modalInput: document.getElementById('rp-modal-input'),
+  modalOk: document.getElementById('rp-modal-ok'),
+  modalCancel: document.getElementById('rp-modal-cancel'),
+};
 buildIndices();
 renderEnemies('all', '');
-renderMarket();
-renderBuildings();
-renderStones();
-renderMaterialIndex();
 </script>
 </body>
 </html>'''
-    return html
 
 
-def main():
-    print("Reading Excel file...")
-    wb = openpyxl.load_workbook(EXCEL_FILE, data_only=True)
+def cache_key():
+    """Spreadsheet mtime plus a digest of the parsing code.
 
-    print("Parsing enemies...")
-    enemies = parse_enemies(wb)
-    print(f"  Found {len(enemies)} enemy entries")
+    All parsing code sits above the map graph section, so editing the map
+    or the app's HTML/CSS/JS below it keeps the cache valid.
+    """
+    with open(os.path.abspath(__file__), encoding='utf-8') as f:
+        parser_src = f.read().split('\n# Map graph data', 1)[0]
+    return (os.stat(EXCEL_FILE).st_mtime_ns,
+            hashlib.sha1(parser_src.encode('utf-8')).hexdigest())
 
-    print("Parsing armor & weapons...")
-    armor_weapons = parse_armor_weapons(wb)
-    print(f"  Found {len(armor_weapons)} armor/weapon entries")
-
-    print("Parsing accessories & items...")
-    accessories = parse_accessories(wb)
-    print(f"  Found {len(accessories)} accessory/item entries")
 
-    print("Parsing market...")
-    market = parse_market(wb)
-    print(f"  Found {len(market)} market entries")
+def load_cached_data():
+    """Return the parsed data from the last build, or None if stale/missing."""
+    try:
+        with open(CACHE_FILE, 'rb') as f:
+            cached = pickle.load(f)
+    except Exception:
+        # Missing, truncated or written by an incompatible Python: re-parse
+        return None
+    if not isinstance(cached, dict) or cached.get('key') != cache_key():
+        return None
+    return cached['data']
 
-    print("Parsing buildings...")
-    buildings, harvest_locations, lux_costs = parse_buildings(wb)
-    print(f"  Found {len(buildings)} building entries")
 
-    print("Parsing speaking stones...")
-    stones = parse_speaking_stones(wb)
-    print(f"  Found {len(stones)} speaking stones")
+def save_cached_data(data):
+    """Store parsed data for the next build; a failed write only costs speed."""
+    try:
+        with open(CACHE_FILE, 'wb') as f:
+            pickle.dump({'key': cache_key(), 'data': data}, f, pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        print(f"  (could not write {CACHE_FILE}: {e})")
 
-    print("Parsing prerequisite chains...")
-    prereqs = parse_prereqs(wb)
-    print(f"  Found {len(prereqs)} prerequisite chains")
 
-    data = {
-        'enemies': enemies,
-        'armorWeapons': armor_weapons,
-        'accessories': accessories,
-        'market': market,
-        'buildings': buildings,
-        'harvestLocations': harvest_locations,
-        'resourceLuxCosts': lux_costs,
-        'speakingStones': stones,
-        'prereqChains': prereqs,
-    }
+def main():
+    # Parsing the spreadsheet dominates the build, and it rarely changes
+    # while iterating on the app's CSS/JS.
+    data = load_cached_data()
+    if data is None:
+        data = parse_workbook()
+        save_cached_data(data)
+    else:
+        print(f"Spreadsheet unchanged, using cached data from {os.path.basename(CACHE_FILE)}")
 
     print("Building map graph...")
     map_graph = enrich_map_graph(data)
@@ -3936,14 +4477,11 @@ def main():
     print(f"  {len(map_graph['nodes'])} nodes, {len(map_graph['edges'])} edges")
 
     print("Generating HTML...")
-    html = build_html(data)
-
     with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        f.write(html)
+        f.writelines(build_html(data))
 
     index_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'index.html')
-    with open(index_file, 'w', encoding='utf-8') as f:
-        f.write(html)
+    shutil.copyfile(OUTPUT_FILE, index_file)
 
     print(f"\nDone! Open this file in your browser:")
     print(f"  {OUTPUT_FILE}")